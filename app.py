@@ -1,5 +1,8 @@
 import os
 import json
+import itertools
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 import yfinance as yf
@@ -7,6 +10,12 @@ from flask import Flask, render_template, request, jsonify
 import plotly
 import plotly.graph_objs as go
 from datetime import datetime, timedelta
+from quote_service import QuoteService
+from request_scheduler import CircuitOpenError, RequestScheduler
+from scanner import apply_pareto, build_strangles, days_to_expiration, filter_otm_options, validate_scan_params
+from payoff import payoff_surface
+from watchlists import AlertQueue, WatchlistMonitor
+from vol_surface import VolSurfaceStore, atm_expirations, meets_iv_rank, uses_iv_rank, with_surface_iv
 
 app = Flask(__name__)
 
@@ -25,6 +34,9 @@ DEFAULT_SCAN_PARAMS = {
     'max_strangle_cost': 15.0,   # Maximum cost of the strangle
     'min_underlying_price': 10,  # Minimum underlying stock price
     'max_underlying_price': 500, # Maximum underlying stock price
+    'pareto_only': False,        # Keep only non-dominated strangles per expiration
+    'use_surface_iv': False,     # Apply min_iv to surface-smoothed IV instead of raw IV
+    'min_iv_rank': 0,            # Minimum IV rank of the underlying (%)
 }
 
 # List of stocks to scan (can be expanded)
@@ -38,6 +50,33 @@ DEFAULT_SYMBOLS = [
     'XOM', 'CVX', 'PFE', 'JNJ', 'UNH'
 ]
 
+# Upstream (Yahoo) request budget shared by scans, charts and refreshes
+UPSTREAM_RATE = 2.0          # Sustained requests per second
+UPSTREAM_BURST = 10          # Requests allowed back to back
+upstream = RequestScheduler(rate=UPSTREAM_RATE, burst=UPSTREAM_BURST)
+
+# Shared underlying quote cache (seconds before a quote is refetched)
+QUOTE_TTL = 60
+quote_service = QuoteService(ttl=QUOTE_TTL, scheduler=upstream)
+
+# Per-chain IV smile cache and per-symbol ATM IV history for IV rank
+vol_surfaces = VolSurfaceStore(history_path=os.environ.get('IV_HISTORY_FILE'))
+
+# Saved scans re-evaluated in the background on every universe refresh
+WATCHLIST_REFRESH_INTERVAL = 300
+alert_queue = AlertQueue(webhook_url=os.environ.get('WATCHLIST_WEBHOOK_URL'))
+watchlist_monitor = WatchlistMonitor(
+    quote_service,
+    alert_queue,
+    interval=WATCHLIST_REFRESH_INTERVAL,
+    path=os.environ.get('WATCHLIST_FILE'),
+    scheduler=upstream,
+    surfaces=vol_surfaces,
+)
+# Saved scans restored from WATCHLIST_FILE keep being evaluated after a restart
+if watchlist_monitor.list_scans():
+    watchlist_monitor.start()
+
 @app.route('/')
 def index():
     return render_template('index.html', default_params=DEFAULT_SCAN_PARAMS, symbols=DEFAULT_SYMBOLS)
@@ -48,137 +87,211 @@ def scan_options():
     symbols = data.get('symbols', DEFAULT_SYMBOLS)
     params = data.get('params', DEFAULT_SCAN_PARAMS)
     
-    # Limit to 5 symbols for demo purposes to avoid rate limiting
-    symbols = symbols[:5]
+    # Reject bad params once instead of failing every symbol
+    try:
+        params = validate_scan_params(params)
+        validate_symbols(symbols)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    results, skipped = run_scan(symbols, params)
+    return jsonify(results)
+
+def validate_symbols(symbols):
+    """Raise ValueError unless symbols is a list of ticker strings"""
+    if not isinstance(symbols, list) or not all(isinstance(s, str) for s in symbols):
+        raise ValueError("Symbols must be a list of ticker strings")
+
+def run_scan(symbols, params, progress=None):
+    """
+    Scan symbols for strangles, paced by the upstream scheduler.
+    
+    Args:
+        symbols (list): Ticker symbols to scan
+        params (dict): Validated scan parameters
+        progress (callable): Called with each symbol once it is done
     
+    Returns:
+        tuple: (results sorted by params['sort_by'], {symbol: reason} for
+            symbols that could not be scanned)
+    """
     results = []
+    skipped = {}
+    
+    # Quote every symbol in one batch and apply the underlying price filter
+    # before any expiration or chain requests are made
+    quotes = quote_service.get_quotes(symbols)
     
     for symbol in symbols:
+        current_price = quotes.get(symbol)
+        
+        if current_price is None:
+            print(f"Skipping {symbol}: No quote available")
+            skipped[symbol] = 'No quote available'
+            if progress:
+                progress(symbol)
+            continue
+        
+        if current_price < params['min_underlying_price'] or current_price > params['max_underlying_price']:
+            print(f"Skipping {symbol}: Price {current_price} outside range {params['min_underlying_price']}-{params['max_underlying_price']}")
+            if progress:
+                progress(symbol)
+            continue
+        
         try:
             print(f"Processing symbol: {symbol}")
             # Get stock data
             stock = yf.Ticker(symbol)
-            current_price = stock.info.get('regularMarketPrice', 0)
             
-            if current_price < params['min_underlying_price'] or current_price > params['max_underlying_price']:
-                print(f"  Skipping {symbol}: Price {current_price} outside range {params['min_underlying_price']}-{params['max_underlying_price']}")
-                continue
-                
             # Get options expiration dates
-            expirations = stock.options
+            expirations = upstream.call(lambda: stock.options)
             print(f"  Found {len(expirations)} expiration dates for {symbol}")
             
+            # Fetch each expiration in range once and fit its IV smile. The
+            # expirations around the ATM tenor are fetched even when outside
+            # the range only if the scan filters or sorts on IV rank.
+            atm_dates = atm_expirations(expirations)
+            fetch_atm = uses_iv_rank(params)
+            chains = []
+            atm_smiles = []
             for exp_date in expirations:
                 # Calculate days to expiration
-                exp_datetime = datetime.strptime(exp_date, '%Y-%m-%d')
-                dte = (exp_datetime - datetime.now()).days
+                dte = days_to_expiration(exp_date)
+                in_range = params['min_dte'] <= dte <= params['max_dte']
                 
-                if dte < params['min_dte'] or dte > params['max_dte']:
+                if not in_range and not (fetch_atm and exp_date in atm_dates):
                     print(f"  Skipping expiration {exp_date}: DTE {dte} outside range {params['min_dte']}-{params['max_dte']}")
                     continue
                 
-                print(f"  Processing expiration {exp_date} (DTE: {dte})")
-                
                 # Get options chain for this expiration
-                opt_chain = stock.option_chain(exp_date)
-                
-                # Process calls
-                calls_df = opt_chain.calls
+                opt_chain = upstream.call(stock.option_chain, exp_date)
+                smile = vol_surfaces.smile(current_price, dte, opt_chain.calls, opt_chain.puts)
+                if exp_date in atm_dates:
+                    atm_smiles.append(smile)
+                if in_range:
+                    chains.append((exp_date, dte, opt_chain, smile))
+            
+            # ATM IV from the fitted surface backs IV rank and percentile
+            symbol_fields = vol_surfaces.symbol_iv(symbol, current_price, atm_smiles)
+            
+            if not meets_iv_rank(params, symbol_fields['iv_rank']):
+                print(f"  Skipping {symbol}: IV rank {symbol_fields['iv_rank']} below minimum {params.get('min_iv_rank')}")
+                if progress:
+                    progress(symbol)
+                continue
+            
+            for exp_date, dte, opt_chain, smile in chains:
+                print(f"  Processing expiration {exp_date} (DTE: {dte})")
                 
-                # Filter calls - simplified approach without delta
-                otm_calls = calls_df[
-                    (calls_df['strike'] > current_price) &  # OTM calls
-                    (calls_df['lastPrice'] >= params['min_price']) &
-                    (calls_df['lastPrice'] <= params['max_price']) &
-                    (calls_df['impliedVolatility'] * 100 >= params['min_iv']) &
-                    (calls_df['volume'] >= params['min_volume']) &
-                    (calls_df['openInterest'] >= params['min_open_interest'])
-                ]
+                calls_df = with_surface_iv(opt_chain.calls, smile, current_price)
+                puts_df = with_surface_iv(opt_chain.puts, smile, current_price)
                 
+                # Filter calls and puts - simplified approach without delta
+                otm_calls = filter_otm_options(calls_df, current_price, 'call', params)
                 print(f"  Found {len(otm_calls)} valid OTM calls")
                 
-                # Process puts
-                puts_df = opt_chain.puts
-                
-                # Filter puts - simplified approach without delta
-                otm_puts = puts_df[
-                    (puts_df['strike'] < current_price) &  # OTM puts
-                    (puts_df['lastPrice'] >= params['min_price']) &
-                    (puts_df['lastPrice'] <= params['max_price']) &
-                    (puts_df['impliedVolatility'] * 100 >= params['min_iv']) &
-                    (puts_df['volume'] >= params['min_volume']) &
-                    (puts_df['openInterest'] >= params['min_open_interest'])
-                ]
-                
+                otm_puts = filter_otm_options(puts_df, current_price, 'put', params)
                 print(f"  Found {len(otm_puts)} valid OTM puts")
                 
                 # Find potential strangles
-                strangle_count = 0
-                for _, call_row in otm_calls.iterrows():
-                    for _, put_row in otm_puts.iterrows():
-                        strangle_cost = call_row['lastPrice'] + put_row['lastPrice']
-                        
-                        if strangle_cost >= params['min_strangle_cost'] and strangle_cost <= params['max_strangle_cost']:
-                            # Calculate metrics for the strangle
-                            call_strike = call_row['strike']
-                            put_strike = put_row['strike']
-                            width = call_strike - put_strike
-                            width_percent = (width / current_price) * 100
-                            
-                            # Calculate breakeven points
-                            upper_breakeven = call_strike + strangle_cost
-                            lower_breakeven = put_strike - strangle_cost
-                            
-                            # Calculate percent to breakeven
-                            upper_pct = ((upper_breakeven / current_price) - 1) * 100
-                            lower_pct = (1 - (lower_breakeven / current_price)) * 100
-                            
-                            # Average IV of the strangle
-                            avg_iv = (call_row['impliedVolatility'] + put_row['impliedVolatility']) * 50
-                            
-                            strangle_count += 1
-                            
-                            results.append({
-                                'symbol': symbol,
-                                'current_price': current_price,
-                                'expiration': exp_date,
-                                'dte': dte,
-                                'call_strike': call_strike,
-                                'put_strike': put_strike,
-                                'call_price': call_row['lastPrice'],
-                                'put_price': put_row['lastPrice'],
-                                'call_iv': call_row['impliedVolatility'] * 100,
-                                'put_iv': put_row['impliedVolatility'] * 100,
-                                'avg_iv': avg_iv,
-                                'call_volume': call_row['volume'],
-                                'put_volume': put_row['volume'],
-                                'call_oi': call_row['openInterest'],
-                                'put_oi': put_row['openInterest'],
-                                'strangle_cost': strangle_cost,
-                                'width': width,
-                                'width_percent': width_percent,
-                                'upper_breakeven': upper_breakeven,
-                                'lower_breakeven': lower_breakeven,
-                                'upper_breakeven_pct': upper_pct,
-                                'lower_breakeven_pct': lower_pct,
-                            })
+                expiration_results = build_strangles(symbol, current_price, exp_date, dte, otm_calls, otm_puts, params)
+                print(f"  Found {len(expiration_results)} valid strangles for {symbol} expiring on {exp_date}")
+                
+                # Drop strangles that another one beats on every objective
+                expiration_results = apply_pareto(expiration_results, params)
                 
-                print(f"  Found {strangle_count} valid strangles for {symbol} expiring on {exp_date}")
+                for strangle in expiration_results:
+                    strangle.update(symbol_fields)
+                results.extend(expiration_results)
                 
+        except CircuitOpenError as e:
+            # Upstream is failing; the remaining symbols would fail the same way
+            print(f"Stopping scan at {symbol}: {str(e)}")
+            for remaining in symbols[symbols.index(symbol):]:
+                skipped.setdefault(remaining, str(e))
+            break
         except Exception as e:
-            print(f"Error processing {symbol}: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            continue
+            # The scheduler already retried; report the symbol and move on
+            print(f"Error processing {symbol}: {type(e).__name__}: {str(e)}")
+            skipped[symbol] = f"{type(e).__name__}: {str(e)}"
+        
+        if progress:
+            progress(symbol)
+    
+    # One history write per scan rather than per symbol
+    vol_surfaces.save_history()
     
     print(f"Total results found: {len(results)}")
     if len(results) > 0:
         print(f"Sample result: {results[0]}")
     
-    # Sort results by average IV (descending)
-    results = sorted(results, key=lambda x: x['avg_iv'], reverse=True)
+    # Sort results by the requested field, average IV by default (descending)
+    sort_by = params.get('sort_by') or 'avg_iv'
+    results = sorted(
+        results,
+        key=lambda x: x.get(sort_by) if x.get(sort_by) is not None else float('-inf'),
+        reverse=True,
+    )
     
-    return jsonify(results)
+    return results, skipped
+
+# Background scan jobs: full-universe scans run at the scheduler's pace and
+# the client polls for progress instead of holding one request open
+MAX_SCAN_JOBS = 20
+scan_jobs = OrderedDict()
+scan_jobs_lock = threading.Lock()
+scan_job_ids = itertools.count(1)
+
+@app.route('/api/scan/jobs', methods=['POST'])
+def start_scan_job():
+    """Start a scan in the background and return its job id"""
+    data = request.json or {}
+    symbols = data.get('symbols', DEFAULT_SYMBOLS)
+    params = data.get('params', DEFAULT_SCAN_PARAMS)
+    
+    try:
+        params = validate_scan_params(params)
+        validate_symbols(symbols)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    job = {
+        'id': str(next(scan_job_ids)),
+        'status': 'running',
+        'total': len(symbols),
+        'scanned': 0,
+        'results': None,
+        'skipped': {},
+        'error': None,
+        'started_at': datetime.now().isoformat(),
+    }
+    with scan_jobs_lock:
+        scan_jobs[job['id']] = job
+        while len(scan_jobs) > MAX_SCAN_JOBS:
+            scan_jobs.popitem(last=False)
+    
+    def progress(symbol):
+        job['scanned'] += 1
+    
+    def run():
+        try:
+            job['results'], job['skipped'] = run_scan(symbols, params, progress)
+            job['status'] = 'done'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'error'
+    
+    threading.Thread(target=run, name=f"scan-job-{job['id']}", daemon=True).start()
+    return jsonify({'id': job['id'], 'status': job['status'], 'total': job['total']}), 202
+
+@app.route('/api/scan/jobs/<job_id>', methods=['GET'])
+def get_scan_job(job_id):
+    """Get a scan job's progress, and its results once it is done"""
+    with scan_jobs_lock:
+        job = scan_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown scan job: {job_id}'}), 404
+    return jsonify(job)
 
 @app.route('/api/chart', methods=['POST'])
 def generate_chart():
@@ -191,7 +304,7 @@ def generate_chart():
     try:
         # Get historical data
         stock = yf.Ticker(symbol)
-        hist = stock.history(period='6mo')
+        hist = upstream.call(stock.history, period='6mo')
         
         # Create candlestick chart
         fig = go.Figure(data=[go.Candlestick(
@@ -228,11 +341,103 @@ def generate_chart():
         chart_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
         return jsonify({'chart': chart_json})
     
+    except CircuitOpenError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/payoff', methods=['POST'])
+def generate_payoff():
+    data = request.json or {}
+    strangle = data.get('strangle')
+    
+    if not strangle:
+        return jsonify({'error': 'Strangle is required'}), 400
+    
+    try:
+        # P&L per share over underlying price x days elapsed x IV shift
+        surface = payoff_surface(strangle, data.get('grid'))
+        return jsonify(surface)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/watchlists', methods=['GET'])
+def list_watchlists():
+    """List saved scans"""
+    return jsonify({
+        'watchlists': watchlist_monitor.list_scans(),
+        'last_refresh': watchlist_monitor.last_refresh,
+    })
+
+@app.route('/api/watchlists', methods=['POST'])
+def create_watchlist():
+    """Save a scan definition for background evaluation"""
+    data = request.json or {}
+    symbols = data.get('symbols')
+    
+    if not symbols:
+        return jsonify({'error': 'Symbols are required'}), 400
+    
+    # Fill in anything the client left out with the default scan parameters
+    params = dict(DEFAULT_SCAN_PARAMS)
+    
+    try:
+        params.update(validate_scan_params(data.get('params') or {}))
+        watchlist = watchlist_monitor.add_scan(data.get('name'), symbols, params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    watchlist_monitor.start()
+    return jsonify(watchlist), 201
+
+@app.route('/api/watchlists/<scan_id>', methods=['GET'])
+def get_watchlist_results(scan_id):
+    """Get the current result set of a saved scan"""
+    results = watchlist_monitor.get_results(scan_id)
+    if results is None:
+        return jsonify({'error': f'Unknown watchlist: {scan_id}'}), 404
+    return jsonify(sorted(results, key=lambda x: x['avg_iv'], reverse=True))
+
+@app.route('/api/watchlists/<scan_id>', methods=['DELETE'])
+def delete_watchlist(scan_id):
+    """Delete a saved scan"""
+    if not watchlist_monitor.remove_scan(scan_id):
+        return jsonify({'error': f'Unknown watchlist: {scan_id}'}), 404
+    return jsonify({'status': 'success'})
+
+@app.route('/api/watchlists/refresh', methods=['POST'])
+def refresh_watchlists():
+    """Refresh the shared universe now and evaluate all saved scans"""
+    try:
+        return jsonify(watchlist_monitor.refresh())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/alerts', methods=['GET'])
+def get_alerts():
+    """Poll watchlist alerts newer than the ?since= alert id"""
+    since = request.args.get('since', 0, type=int)
+    return jsonify({'alerts': alert_queue.since(since)})
+
+@app.route('/api/scheduler/stats', methods=['GET'])
+def scheduler_stats():
+    """Upstream request queue depth, wait times and throttle events"""
+    return jsonify(upstream.stats())
+
+# Local execution simulator, used instead of Alpaca when TRADING_MODE=simulated
+simulated_trader = None
+
 def get_alpaca_trader():
     """Helper function to get an instance of AlpacaOptionsTrader"""
+    global simulated_trader
+    if os.environ.get('TRADING_MODE') == 'simulated':
+        if simulated_trader is None:
+            from execution_simulator import SimulatedOptionsTrader
+            simulated_trader = SimulatedOptionsTrader()
+        return simulated_trader
+    
     # Get API credentials from environment variables
     api_key = os.environ.get('ALPACA_API_KEY')
     api_secret = os.environ.get('ALPACA_API_SECRET')
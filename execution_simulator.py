@@ -0,0 +1,556 @@
+import bisect
+import heapq
+import itertools
+import math
+import threading
+from datetime import datetime, time, timedelta
+
+from trading_integration import AlpacaOptionsTrader
+
+# Shares per option contract
+CONTRACT_MULTIPLIER = 100
+
+# Synthetic quotes around a leg's reference price when no quote is stored
+SYNTHETIC_SPREAD = 0.05      # Bid/ask spread as a fraction of the price
+SYNTHETIC_MIN_TICK = 0.01    # Smallest half-spread and lowest bid
+SYNTHETIC_DEPTH = 50         # Contracts available on each side, refilled per order and clock step
+
+# Local time at which open DAY orders expire
+SESSION_CLOSE = time(16, 0)
+
+
+class SimulatedOptionsTrader(AlpacaOptionsTrader):
+    """
+    Local paper-trading engine behind the AlpacaOptionsTrader interface.
+
+    Strangle orders rest in an in-memory order book and fill against stored
+    or synthetic leg quotes. Market orders take whatever size is quoted,
+    limit orders wait until the combo price reaches their limit, and both
+    can fill partially, and buys never spend more than the account's cash.
+    Resting orders are booked per leg combination in price-time priority,
+    so a quote change that actually moves a leg walks only the orders on
+    that leg that cross. Synthetic quotes are refilled on every new order
+    and clock step. Time
+    in force is honoured: IOC remainders are cancelled at once and DAY
+    orders expire once the clock passes SESSION_CLOSE, or at the session
+    end passed to advance_time.
+    """
+
+    def __init__(self, starting_cash=100000.0, now=None):
+        """
+        Initialize the simulator.
+
+        Args:
+            starting_cash (float): Account cash before any fills
+            now (datetime): Simulation clock start, defaults to the wall clock
+        """
+        self.cash = float(starting_cash)
+        self.starting_cash = float(starting_cash)
+        self._now = now
+        self._quotes = {}
+        self._synthetic = set()
+        self._orders = {}
+        self._day_expiries = []
+        self._books = {}
+        self._books_by_leg = {}
+        self._resting = {}
+        self._positions = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def now(self):
+        """Current simulation time."""
+        return self._now or datetime.now()
+
+    def get_account(self):
+        """Get simulated account balances."""
+        with self._lock:
+            self._expire_day_orders()
+            return {
+                'cash': round(self.cash, 2),
+                'starting_cash': self.starting_cash,
+                'open_orders': len(self._resting),
+                'positions': len(self._positions),
+            }
+
+    def get_orders(self, status='all', limit=50):
+        """
+        Get simulated orders, newest first.
+
+        Args:
+            status (str): Filter orders by status ('open', 'closed', 'all')
+            limit (int): Maximum number of orders to return
+
+        Returns:
+            dict: Dictionary containing orders information
+        """
+        with self._lock:
+            self._expire_day_orders()
+            orders = []
+            for order_id in reversed(list(self._orders)):
+                order = self._orders[order_id]
+                is_open = order['status'] in ('new', 'partially_filled')
+                if status == 'open' and not is_open or status == 'closed' and is_open:
+                    continue
+                orders.append(self._describe(order))
+                if len(orders) >= limit:
+                    break
+
+        return {
+            'status': 'success',
+            'orders': orders
+        }
+
+    def get_positions(self):
+        """Get open option positions with their average entry price."""
+        with self._lock:
+            return {
+                'status': 'success',
+                'positions': [
+                    {
+                        'symbol': option_symbol,
+                        'qty': position['qty'],
+                        'avg_entry_price': round(position['avg_price'], 4),
+                    }
+                    for option_symbol, position in self._positions.items()
+                    if position['qty']
+                ]
+            }
+
+    def execute_strangle(self, trade_request):
+        """
+        Submit a strangle order to the simulated book and match it at once.
+
+        Args:
+            trade_request (dict): Same structure as AlpacaOptionsTrader.execute_strangle
+
+        Returns:
+            dict: Order confirmation details, including fill status
+        """
+        self._validate_trade_request(trade_request)
+        quantity = int(trade_request['quantity'])
+        if quantity <= 0:
+            raise ValueError(f"Quantity must be positive, got {trade_request['quantity']}")
+
+        with self._lock:
+            self._expire_day_orders()
+            legs = []
+            for leg in trade_request['legs']:
+                option_symbol = self._option_symbol(trade_request['symbol'], leg)
+                if option_symbol not in self._quotes:
+                    self._quotes[option_symbol] = self._synthetic_quote(leg)
+                    self._synthetic.add(option_symbol)
+                legs.append(dict(leg, occ_symbol=option_symbol, side=leg.get('side', 'buy').lower()))
+
+            # Orders already resting on synthetic legs get the refilled depth first
+            self._refill_synthetic(leg['occ_symbol'] for leg in legs)
+            side = 'sell' if all(leg['side'] == 'sell' for leg in legs) else 'buy'
+            if side == 'buy':
+                if trade_request['order_type'].lower() == 'limit':
+                    debit = float(trade_request['limit_price'])
+                else:
+                    debit = self._quoted_price(legs, side) or 0.0
+                if debit * quantity * CONTRACT_MULTIPLIER > self.cash:
+                    raise ValueError(f"Insufficient cash: {quantity} x {debit:.2f} exceeds {self.cash:.2f}")
+
+            order_id = f"sim-{next(self._ids)}"
+
+            order = {
+                'id': order_id,
+                'symbol': trade_request['symbol'],
+                'strategy': trade_request['strategy'],
+                'legs': legs,
+                'side': side,
+                'type': trade_request['order_type'].lower(),
+                'time_in_force': trade_request['time_in_force'].lower(),
+                'limit_price': trade_request.get('limit_price'),
+                'quantity': quantity,
+                'filled_qty': 0,
+                'filled_avg_price': None,
+                'status': 'new',
+                'created_at': self.now().isoformat(),
+                'filled_at': None,
+            }
+            self._orders[order_id] = order
+
+            self._match(order)
+            if order['time_in_force'] == 'ioc' and order['status'] in ('new', 'partially_filled'):
+                order['status'] = 'canceled'
+            if order['status'] in ('new', 'partially_filled'):
+                self._rest(order)
+                if order['time_in_force'] == 'day':
+                    heapq.heappush(self._day_expiries, (self._session_close(self.now()), order_id))
+
+            return {
+                'status': 'success',
+                'order_id': order_id,
+                'message': 'Order submitted to simulator',
+                'order_status': order['status'],
+                'filled_qty': order['filled_qty'],
+                'filled_avg_price': order['filled_avg_price'],
+                'order_details': {
+                    'symbol': trade_request['symbol'],
+                    'strategy': trade_request['strategy'],
+                    'quantity': trade_request['quantity'],
+                    'order_type': trade_request['order_type'],
+                    'time_in_force': trade_request['time_in_force'],
+                    'legs': trade_request['legs']
+                }
+            }
+
+    def cancel_order(self, order_id):
+        """Cancel a resting order. Returns False if it is not open."""
+        with self._lock:
+            self._expire_day_orders()
+            order = self._orders.get(order_id)
+            if not order or order['status'] not in ('new', 'partially_filled'):
+                return False
+            self._close(order, 'canceled')
+            return True
+
+    def update_quote(self, option_symbol, bid, ask, bid_size=SYNTHETIC_DEPTH, ask_size=SYNTHETIC_DEPTH):
+        """
+        Store a leg quote and re-match the orders resting on that leg.
+
+        Orders are only re-matched when the price or size changed.
+
+        Args:
+            option_symbol (str): OCC option symbol
+            bid (float): Bid price
+            ask (float): Ask price
+            bid_size (int): Contracts available at the bid
+            ask_size (int): Contracts available at the ask
+
+        Returns:
+            int: Number of orders that received a fill
+
+        Raises:
+            ValueError: If a price is not finite, bid > ask or a size is negative
+        """
+        quote = {
+            'bid': float(bid),
+            'ask': float(ask),
+            'bid_size': int(bid_size),
+            'ask_size': int(ask_size),
+        }
+        if not (math.isfinite(quote['bid']) and math.isfinite(quote['ask'])):
+            raise ValueError(f"Quote for {option_symbol} must have finite prices, got {bid}/{ask}")
+        if not 0 <= quote['bid'] <= quote['ask']:
+            raise ValueError(f"Quote for {option_symbol} needs 0 <= bid <= ask, got {bid}/{ask}")
+        if quote['bid_size'] < 0 or quote['ask_size'] < 0:
+            raise ValueError(f"Quote sizes for {option_symbol} must not be negative")
+
+        with self._lock:
+            self._expire_day_orders()
+            self._synthetic.discard(option_symbol)
+            if self._quotes.get(option_symbol) == quote:
+                return 0
+            self._quotes[option_symbol] = quote
+            return self._match_leg(option_symbol)
+
+    def load_chain(self, symbol, exp_date, calls_df, puts_df):
+        """
+        Store bid/ask quotes for every contract in a yfinance option chain.
+
+        Rows with a missing or crossed bid/ask are skipped.
+
+        Returns:
+            int: Number of contracts quoted
+        """
+        loaded = 0
+        for option_type, options_df in (('call', calls_df), ('put', puts_df)):
+            for row in options_df[['strike', 'bid', 'ask']].itertuples(index=False):
+                if not (math.isfinite(row.bid) and math.isfinite(row.ask) and 0 <= row.bid <= row.ask and row.ask > 0):
+                    continue
+                leg = {'option_type': option_type, 'strike': row.strike, 'expiration': exp_date}
+                self.update_quote(self._option_symbol(symbol, leg), row.bid, row.ask)
+                loaded += 1
+        return loaded
+
+    def advance_time(self, now, session_close=False):
+        """
+        Move the simulation clock.
+
+        DAY orders placed before a SESSION_CLOSE the clock has now passed
+        expire, and synthetic quotes are refilled for the orders left.
+
+        Args:
+            now (datetime): New simulation time
+            session_close (bool): Expire all open DAY orders regardless
+
+        Returns:
+            int: Number of orders expired
+        """
+        with self._lock:
+            self._now = now
+            expired = self._expire_day_orders()
+            if session_close:
+                closing = [self._orders[order_id] for order_id in self._resting
+                           if self._orders[order_id]['time_in_force'] == 'day']
+                for order in closing:
+                    self._close(order, 'expired')
+                expired += len(closing)
+            self._refill_synthetic(list(self._synthetic))
+            return expired
+
+    def replay(self, events):
+        """
+        Replay a time-ordered stream of simulation events.
+
+        Args:
+            events (iterable): Dicts with a 'type' of 'quote' (option_symbol,
+                bid, ask and optional sizes), 'order' (trade_request),
+                'cancel' (order_id) or 'time' (time, optional session_close)
+
+        Returns:
+            dict: Counts of events processed by type and orders by final status
+        """
+        counts = {}
+        for event in events:
+            kind = event['type']
+            if kind == 'quote':
+                self.update_quote(event['option_symbol'], event['bid'], event['ask'],
+                                  event.get('bid_size', SYNTHETIC_DEPTH), event.get('ask_size', SYNTHETIC_DEPTH))
+            elif kind == 'order':
+                self.execute_strangle(event['trade_request'])
+            elif kind == 'cancel':
+                self.cancel_order(event['order_id'])
+            elif kind == 'time':
+                self.advance_time(event['time'], event.get('session_close', False))
+            else:
+                raise ValueError(f"Unknown replay event type: {kind}")
+            counts[kind] = counts.get(kind, 0) + 1
+
+        with self._lock:
+            statuses = {}
+            for order in self._orders.values():
+                statuses[order['status']] = statuses.get(order['status'], 0) + 1
+
+        return {'events': counts, 'orders': statuses}
+
+    def _synthetic_quote(self, leg):
+        """Quote around the leg's reference price from the scan."""
+        price = float(leg.get('price') or 0)
+        if not math.isfinite(price) or price < 0:
+            price = 0.0
+        half_spread = max(SYNTHETIC_MIN_TICK, price * SYNTHETIC_SPREAD / 2)
+        return {
+            'bid': max(SYNTHETIC_MIN_TICK, price - half_spread),
+            'ask': price + half_spread,
+            'bid_size': SYNTHETIC_DEPTH,
+            'ask_size': SYNTHETIC_DEPTH,
+        }
+
+    def _refill_synthetic(self, option_symbols):
+        """Restore full depth on synthetic quotes, re-matching only legs that were drawn down."""
+        for option_symbol in option_symbols:
+            if option_symbol not in self._synthetic:
+                continue
+            quote = self._quotes[option_symbol]
+            if quote['bid_size'] == SYNTHETIC_DEPTH and quote['ask_size'] == SYNTHETIC_DEPTH:
+                continue
+            quote['bid_size'] = quote['ask_size'] = SYNTHETIC_DEPTH
+            self._match_leg(option_symbol)
+
+    def _book_key(self, order):
+        """Orders on the same legs and sides share a combo price, so share a book."""
+        return (order['side'], tuple((leg['occ_symbol'], leg['side']) for leg in order['legs']))
+
+    def _rest(self, order):
+        """Add an open order to its book in price-time priority."""
+        if order['type'] == 'market':
+            priority = (0, 0.0)
+        else:
+            limit = float(order['limit_price'])
+            # Buyers paying more and sellers asking less go first
+            priority = (1, -limit if order['side'] == 'buy' else limit)
+        entry = (priority, int(order['id'].split('-')[1]), order['id'])
+        book_key = self._book_key(order)
+        book = self._books.get(book_key)
+        if book is None:
+            book = self._books[book_key] = []
+            for leg in order['legs']:
+                self._books_by_leg.setdefault(leg['occ_symbol'], {})[book_key] = True
+        bisect.insort(book, entry)
+        self._resting[order['id']] = (book_key, entry)
+
+    def _match_leg(self, option_symbol):
+        """Re-match the books resting on one leg; returns how many orders filled."""
+        filled = 0
+        for book_key in list(self._books_by_leg.get(option_symbol, ())):
+            filled += self._match_book(book_key)
+        return filled
+
+    def _match_book(self, book_key):
+        """Walk one book best-first until an order does not cross or depth runs out."""
+        book = self._books.get(book_key)
+        if not book:
+            return 0
+        price = self._quoted_price(self._orders[book[0][2]]['legs'], book_key[0])
+        if price is None:
+            return 0
+
+        filled = 0
+        position = 0
+        while book and position < len(book):
+            order = self._orders[book[position][2]]
+            if not self._crosses(order, price):
+                # Later orders have worse limits
+                break
+            if self._match(order):
+                filled += 1
+                if order['status'] != 'filled':
+                    # A partial fill means a leg ran out of size
+                    break
+                # Filled orders leave the book, so the next one moved up
+            elif self._depth(order['legs']) <= 0:
+                break
+            else:
+                # Crossing but unaffordable; later, smaller orders may still fit
+                position += 1
+        return filled
+
+    def _depth(self, legs):
+        """Contracts available for the whole combo at the current quotes."""
+        sizes = [self._quotes[leg['occ_symbol']]['ask_size' if leg['side'] == 'buy' else 'bid_size'] for leg in legs]
+        return min(sizes)
+
+    @staticmethod
+    def _crosses(order, price):
+        """Whether an order accepts a combo price."""
+        if order['type'] != 'limit':
+            return True
+        limit = float(order['limit_price'])
+        return price <= limit if order['side'] == 'buy' else price >= limit
+
+    def _expire_day_orders(self):
+        """Expire open DAY orders whose session close the clock has passed."""
+        now = self.now()
+        expired = 0
+        while self._day_expiries and self._day_expiries[0][0] <= now:
+            _, order_id = heapq.heappop(self._day_expiries)
+            order = self._orders[order_id]
+            if order['status'] in ('new', 'partially_filled'):
+                self._close(order, 'expired')
+                expired += 1
+        return expired
+
+    @staticmethod
+    def _session_close(moment):
+        """The SESSION_CLOSE a DAY order placed at ``moment`` expires at."""
+        close = datetime.combine(moment.date(), SESSION_CLOSE, tzinfo=moment.tzinfo)
+        # Orders placed after the close are good for the next session
+        return close if moment < close else close + timedelta(days=1)
+
+    def _quoted_price(self, legs, side):
+        """Combo price at the current quotes, a debit for buys, a credit for sells; None if unpriced."""
+        price = 0.0
+        for leg in legs:
+            quote = self._quotes[leg['occ_symbol']]
+            buying = leg['side'] == 'buy'
+            leg_price = quote['ask'] if buying else quote['bid']
+            if not leg_price > 0:
+                return None
+            price += leg_price if buying == (side == 'buy') else -leg_price
+        return price
+
+    def _match(self, order):
+        """Fill as much of an open order as the current quotes allow."""
+        remaining = order['quantity'] - order['filled_qty']
+        if remaining <= 0:
+            return False
+
+        price = 0.0
+        available = remaining
+        fills = []
+        for leg in order['legs']:
+            quote = self._quotes[leg['occ_symbol']]
+            buying = leg['side'] == 'buy'
+            leg_price = quote['ask'] if buying else quote['bid']
+            size = quote['ask_size'] if buying else quote['bid_size']
+            # Also rejects NaN, which compares false both ways
+            if not leg_price > 0 or size <= 0:
+                return False
+            # Debit for a buy order, credit for a sell order
+            price += leg_price if buying == (order['side'] == 'buy') else -leg_price
+            available = min(available, size)
+            fills.append((leg, quote, buying, leg_price))
+
+        if not self._crosses(order, price):
+            return False
+
+        if order['side'] == 'buy' and price > 0:
+            # Never spend more cash than the account holds
+            available = min(available, int(self.cash // (price * CONTRACT_MULTIPLIER)))
+            if available <= 0:
+                return False
+
+        qty = available
+        for leg, quote, buying, leg_price in fills:
+            quote['ask_size' if buying else 'bid_size'] -= qty
+            self._update_position(leg['occ_symbol'], qty if buying else -qty, leg_price)
+            self.cash -= (leg_price if buying else -leg_price) * qty * CONTRACT_MULTIPLIER
+
+        previous = order['filled_qty']
+        order['filled_qty'] = previous + qty
+        order['filled_avg_price'] = round(
+            ((order['filled_avg_price'] or 0) * previous + price * qty) / order['filled_qty'], 4
+        )
+        if order['filled_qty'] >= order['quantity']:
+            self._close(order, 'filled')
+        else:
+            order['status'] = 'partially_filled'
+        return True
+
+    def _update_position(self, option_symbol, qty, price):
+        position = self._positions.setdefault(option_symbol, {'qty': 0, 'avg_price': 0.0})
+        new_qty = position['qty'] + qty
+        if position['qty'] == 0 or (position['qty'] > 0) == (qty > 0):
+            # Adding to (or opening) a position moves the average price
+            position['avg_price'] = (position['avg_price'] * abs(position['qty']) + price * abs(qty)) / abs(new_qty)
+        elif new_qty and (new_qty > 0) != (position['qty'] > 0):
+            # Flipped through zero: the remainder opened at this price
+            position['avg_price'] = price
+        position['qty'] = new_qty
+        if new_qty == 0:
+            del self._positions[option_symbol]
+
+    def _close(self, order, status):
+        order['status'] = status
+        if status == 'filled':
+            order['filled_at'] = self.now().isoformat()
+        placed = self._resting.pop(order['id'], None)
+        if placed is None:
+            return
+        book_key, entry = placed
+        book = self._books[book_key]
+        del book[bisect.bisect_left(book, entry)]
+        if not book:
+            del self._books[book_key]
+            for leg in order['legs']:
+                books = self._books_by_leg[leg['occ_symbol']]
+                books.pop(book_key, None)
+                if not books:
+                    del self._books_by_leg[leg['occ_symbol']]
+
+    @staticmethod
+    def _describe(order):
+        return {
+            'id': order['id'],
+            'symbol': order['symbol'],
+            'strategy': order['strategy'],
+            'status': order['status'],
+            'created_at': order['created_at'],
+            'filled_at': order['filled_at'],
+            'legs': [
+                {'option_type': leg['option_type'], 'strike': leg['strike'], 'expiration': leg['expiration']}
+                for leg in order['legs']
+            ],
+            'quantity': order['quantity'],
+            'filled_qty': order['filled_qty'],
+            'filled_price': order['filled_avg_price'],
+            'side': order['side'],
+            'type': order['type'],
+            'time_in_force': order['time_in_force'],
+            'limit_price': order['limit_price'],
+        }
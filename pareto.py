@@ -0,0 +1,207 @@
+import numpy as np
+
+# Default dominance objectives for strangles: (result field, 'min' or 'max')
+DEFAULT_OBJECTIVES = [
+    ('strangle_cost', 'min'),
+    ('upper_breakeven_pct', 'max'),
+    ('lower_breakeven_pct', 'max'),
+    ('avg_iv', 'max'),
+]
+
+
+def pareto_filter(strangles, objectives=None):
+    """
+    Keep only the strangles that no other strangle dominates.
+
+    A strangle is dominated when another one is at least as good on every
+    objective and strictly better on at least one. Identical strangles do
+    not dominate each other, so all copies of an efficient point are kept.
+
+    Args:
+        strangles (list): Strangle result dicts, typically one expiration
+        objectives (list): (field, 'min' or 'max') pairs to compare on,
+            defaults to DEFAULT_OBJECTIVES
+
+    Returns:
+        list: The Pareto-efficient strangles, in their original order
+    """
+    if len(strangles) < 2:
+        return list(strangles)
+
+    objectives = validate_objectives(objectives or DEFAULT_OBJECTIVES)
+    columns = []
+    for field, direction in objectives:
+        values = np.array([s[field] for s in strangles], dtype=float)
+        # Everything is minimized internally
+        columns.append(values if direction == 'min' else -values)
+
+    points = np.column_stack(columns)
+    mask = pareto_mask(points)
+    return [s for s, keep in zip(strangles, mask) if keep]
+
+
+def validate_objectives(objectives, fields=None):
+    """
+    Check a list of (field, 'min' or 'max') objectives.
+
+    Args:
+        objectives (list): Objective pairs, e.g. from scan params
+        fields (iterable): Allowed field names, any field if None
+
+    Returns:
+        list: The objectives as (field, direction) tuples
+
+    Raises:
+        ValueError: If the list is empty or an objective is malformed,
+            names an unknown field or has an invalid direction
+    """
+    if not isinstance(objectives, (list, tuple)) or not objectives:
+        raise ValueError("Pareto objectives must be a non-empty list of [field, direction] pairs")
+
+    checked = []
+    for objective in objectives:
+        if not isinstance(objective, (list, tuple)) or len(objective) != 2:
+            raise ValueError(f"Invalid Pareto objective: {objective}")
+        field, direction = objective
+        if fields is not None and field not in fields:
+            raise ValueError(f"Unknown Pareto objective field: {field}")
+        if direction not in ('min', 'max'):
+            raise ValueError(f"Invalid objective direction for {field}: {direction}")
+        checked.append((field, direction))
+    return checked
+
+
+def pareto_mask(points):
+    """
+    Boolean mask of the non-dominated rows of ``points`` (all minimized).
+
+    Rows are deduplicated and sorted lexicographically, so any dominating
+    row is always processed before the rows it dominates. One and two
+    objectives are then a single sweep, three objectives a sweep with a
+    Fenwick tree of prefix minima, both O(n log n). More objectives use
+    divide and conquer in O(n log^(d-2) n) for d objectives.
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or len(points) == 0:
+        return np.ones(len(points), dtype=bool)
+
+    unique, inverse = np.unique(points, axis=0, return_inverse=True)
+    dims = unique.shape[1]
+
+    if dims == 1:
+        keep = np.zeros(len(unique), dtype=bool)
+        keep[0] = True
+    elif dims == 2:
+        keep = _front_2d(unique)
+    elif dims == 3:
+        keep = _front_3d(unique)
+    else:
+        keep = _front_divide(unique)
+
+    return keep[np.asarray(inverse).reshape(-1)]
+
+
+def _front_2d(unique):
+    """Sweep over lexicographically sorted unique rows of two objectives."""
+    y = unique[:, 1]
+    best_before = np.concatenate(([np.inf], np.minimum.accumulate(y)[:-1]))
+    return y < best_before
+
+
+def _front_3d(unique):
+    """Sweep over sorted unique rows, querying earlier rows by (y, z)."""
+    y_ranks = np.unique(unique[:, 1], return_inverse=True)[1].reshape(-1)
+    z = unique[:, 2]
+    size = int(y_ranks.max()) + 1
+    tree = np.full(size + 1, np.inf)
+    keep = np.ones(len(unique), dtype=bool)
+
+    for i in range(len(unique)):
+        # Smallest z among earlier rows whose y is no larger than this row's
+        best = np.inf
+        j = int(y_ranks[i]) + 1
+        while j > 0:
+            if tree[j] < best:
+                best = tree[j]
+            j -= j & -j
+        if best <= z[i]:
+            keep[i] = False
+            continue
+
+        j = int(y_ranks[i]) + 1
+        while j <= size:
+            if z[i] < tree[j]:
+                tree[j] = z[i]
+            j += j & -j
+
+    return keep
+
+
+def _front_divide(unique, leaf_size=64):
+    """
+    Divide and conquer over sorted unique rows of four or more objectives.
+
+    The first half of the rows can never be dominated by the second half,
+    so each half is reduced to its own front and the second half's front is
+    then filtered against the first's on the remaining objectives. With the
+    filter itself recursing one objective at a time this is O(n log^(d-2) n).
+    """
+    def front(rows):
+        if len(rows) <= leaf_size:
+            points = unique[rows]
+            # Only earlier rows can dominate later ones
+            within = (points[:, None, :] <= points[None, :, :]).all(axis=2)
+            within &= np.triu(np.ones_like(within), k=1)
+            return rows[~within.any(axis=0)]
+
+        middle = len(rows) // 2
+        first = front(rows[:middle])
+        second = front(rows[middle:])
+        # Every first-half row is no worse on the leading objective
+        dominated = _dominated(unique[first, 1:], unique[second, 1:])
+        return np.concatenate((first, second[~dominated]))
+
+    keep = np.zeros(len(unique), dtype=bool)
+    keep[front(np.arange(len(unique)))] = True
+    return keep
+
+
+def _dominated(a, b, leaf_size=4096):
+    """Mask of the rows of ``b`` that some row of ``a`` is <= on every column."""
+    dominated = np.zeros(len(b), dtype=bool)
+    if len(a) == 0 or len(b) == 0:
+        return dominated
+
+    if len(a) * len(b) <= leaf_size:
+        return (a[:, None, :] <= b[None, :, :]).all(axis=2).any(axis=0)
+
+    if a.shape[1] == 1:
+        return b[:, 0] >= a[:, 0].min()
+
+    # Order both sets on the first column, rows of ``a`` ahead of ties
+    values = np.concatenate((a[:, 0], b[:, 0]))
+    from_b = np.concatenate((np.zeros(len(a), dtype=bool), np.ones(len(b), dtype=bool)))
+    order = np.lexsort((from_b, values))
+
+    if a.shape[1] == 2:
+        # Sweep: smallest second column among the rows of ``a`` seen so far
+        second = np.concatenate((a[:, 1], np.full(len(b), np.inf)))
+        best = np.minimum.accumulate(second[order])
+        b_positions = np.flatnonzero(from_b[order])
+        dominated[order[b_positions] - len(a)] = best[b_positions] <= b[order[b_positions] - len(a), 1]
+        return dominated
+
+    # Split the combined order in half; only the low half of ``a`` can
+    # dominate the high half of ``b`` on the first column, so that pairing
+    # drops to the remaining columns
+    low = np.zeros(len(values), dtype=bool)
+    low[order[:len(order) // 2]] = True
+    a_low, a_high = low[:len(a)], ~low[:len(a)]
+    b_low, b_high = low[len(a):], ~low[len(a):]
+
+    dominated[b_low] = _dominated(a[a_low], b[b_low], leaf_size)
+    high = np.flatnonzero(b_high)
+    dominated[high] = _dominated(a[a_high], b[high], leaf_size)
+    open_high = high[~dominated[high]]
+    dominated[open_high] = _dominated(a[a_low][:, 1:], b[open_high][:, 1:], leaf_size)
+    return dominated
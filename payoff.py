@@ -0,0 +1,199 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Annualized risk-free rate used for mark-to-model pricing
+RISK_FREE_RATE = 0.04
+
+# Default scenario grid for a strangle payoff surface
+DEFAULT_GRID = {
+    'price_points': 200,     # Underlying price steps
+    'price_range': 0.30,     # +/- fraction of the current price covered
+    'day_points': 60,        # Days-elapsed steps from today to expiration
+    'iv_shifts': [-10, -5, 0, 5, 10],  # Parallel IV shifts (vol points)
+}
+
+# Largest grid a client may request (500 x 250 x 11 keeps responses to a few MB)
+MAX_PRICE_POINTS = 500
+MAX_DAY_POINTS = 250
+MAX_IV_SHIFTS = 11
+
+# Surfaces kept for repeat requests, bounded by total P&L cells (8 bytes each)
+MAX_CACHED_CELLS = 2_000_000
+
+_surface_cache = OrderedDict()
+_cached_cells = 0
+_cache_lock = threading.Lock()
+
+
+def norm_cdf(x):
+    """
+    Vectorized standard normal CDF.
+
+    Uses the Abramowitz-Stegun 7.1.26 erf approximation (absolute error
+    below 1.5e-7) so pricing does not need scipy.
+    """
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def black_scholes(option_type, spot, strike, years, vol, rate=RISK_FREE_RATE):
+    """
+    Price European options with Black-Scholes over broadcastable arrays.
+
+    Args:
+        option_type (str): 'call' or 'put'
+        spot (ndarray): Underlying prices
+        strike (float): Strike price
+        years (ndarray): Time to expiration in years
+        vol (ndarray): Volatility as a decimal
+        rate (float): Annualized risk-free rate
+
+    Returns:
+        ndarray: Option values, intrinsic value where no time or vol is left
+    """
+    spot, years, vol = np.broadcast_arrays(
+        np.asarray(spot, dtype=float),
+        np.asarray(years, dtype=float),
+        np.asarray(vol, dtype=float),
+    )
+    live = (years > 0) & (vol > 0)
+    safe_years = np.where(live, years, 1.0)
+    safe_vol = np.where(live, vol, 1.0)
+
+    sqrt_t = np.sqrt(safe_years)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * safe_vol ** 2) * safe_years) / (safe_vol * sqrt_t)
+    d2 = d1 - safe_vol * sqrt_t
+    discount = strike * np.exp(-rate * safe_years)
+
+    if option_type == 'call':
+        value = spot * norm_cdf(d1) - discount * norm_cdf(d2)
+        intrinsic = np.maximum(spot - strike, 0.0)
+    elif option_type == 'put':
+        value = discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+        intrinsic = np.maximum(strike - spot, 0.0)
+    else:
+        raise ValueError(f"Invalid option type: {option_type}")
+
+    return np.where(live, value, intrinsic)
+
+
+def payoff_surface(strangle, grid=None):
+    """
+    Mark-to-model P&L of a long strangle over price x days x IV shift.
+
+    Args:
+        strangle (dict): A strangle from scan output; uses current_price,
+            dte, call/put strike, price and IV (percent)
+        grid (dict): Overrides for DEFAULT_GRID
+
+    Returns:
+        dict: Grid axes and 'pnl' per share indexed [iv_shift][day][price]
+    """
+    for field in ('current_price', 'dte', 'call_strike', 'put_strike',
+                  'call_price', 'put_price', 'call_iv', 'put_iv'):
+        if field not in strangle:
+            raise ValueError(f"Missing required field: {field}")
+
+    if grid is not None and not isinstance(grid, dict):
+        raise ValueError("Grid must be an object")
+    spec = dict(DEFAULT_GRID)
+    spec.update(grid or {})
+    if not isinstance(spec['iv_shifts'], (list, tuple)):
+        raise ValueError("iv_shifts must be a list of numbers")
+
+    try:
+        legs = (
+            float(strangle['current_price']),
+            int(strangle['dte']),
+            float(strangle['call_strike']),
+            float(strangle['call_price']),
+            float(strangle['call_iv']),
+            float(strangle['put_strike']),
+            float(strangle['put_price']),
+            float(strangle['put_iv']),
+        )
+        grid_key = (
+            int(spec['price_points']),
+            float(spec['price_range']),
+            int(spec['day_points']),
+            tuple(float(shift) for shift in spec['iv_shifts']),
+        )
+    except (TypeError, ValueError):
+        raise ValueError("Strangle and grid values must be numbers")
+
+    spot, dte, call_strike, call_price, call_iv, put_strike, put_price, put_iv = legs
+    if not all(math.isfinite(value) for value in legs + grid_key[:3] + grid_key[3]):
+        raise ValueError("Strangle and grid values must be finite")
+    if spot <= 0 or call_strike <= 0 or put_strike <= 0:
+        raise ValueError("current_price and strikes must be positive")
+    if call_price < 0 or put_price < 0 or call_iv < 0 or put_iv < 0:
+        raise ValueError("Option prices and IVs must not be negative")
+
+    price_points, price_range, day_points, iv_shifts = grid_key
+    if not 2 <= price_points <= MAX_PRICE_POINTS:
+        raise ValueError(f"price_points must be between 2 and {MAX_PRICE_POINTS}")
+    if not 1 <= day_points <= MAX_DAY_POINTS:
+        raise ValueError(f"day_points must be between 1 and {MAX_DAY_POINTS}")
+    if not 1 <= len(iv_shifts) <= MAX_IV_SHIFTS:
+        raise ValueError(f"iv_shifts must have between 1 and {MAX_IV_SHIFTS} values")
+    if not 0 < price_range < 1:
+        raise ValueError("price_range must be between 0 and 1")
+
+    prices, days, shifts, cost, pnl = _cached_surface(legs, grid_key)
+    return {
+        'prices': prices.tolist(),
+        'days': days.tolist(),
+        'iv_shifts': shifts.tolist(),
+        'cost': cost,
+        'pnl': pnl.tolist(),
+    }
+
+
+def _cached_surface(legs, grid_key):
+    """Surface arrays for one (legs, grid spec) pair, from the LRU cache if present."""
+    global _cached_cells
+    key = (legs, grid_key)
+    with _cache_lock:
+        if key in _surface_cache:
+            _surface_cache.move_to_end(key)
+            return _surface_cache[key]
+
+    surface = _payoff_surface(legs, grid_key)
+
+    with _cache_lock:
+        if key not in _surface_cache:
+            _surface_cache[key] = surface
+            _cached_cells += surface[-1].size
+            while _cached_cells > MAX_CACHED_CELLS:
+                _, evicted = _surface_cache.popitem(last=False)
+                _cached_cells -= evicted[-1].size
+    return surface
+
+
+def _payoff_surface(legs, grid_key):
+    """Evaluate the surface for one (legs, grid spec) pair as numpy arrays."""
+    spot, dte, call_strike, call_price, call_iv, put_strike, put_price, put_iv = legs
+    price_points, price_range, day_points, iv_shifts = grid_key
+
+    prices = np.linspace(spot * (1 - price_range), spot * (1 + price_range), price_points)
+    days = np.linspace(0, max(dte, 0), day_points)
+    shifts = np.asarray(iv_shifts)
+
+    # Axes broadcast to (iv_shift, day, price) so both legs price in one pass
+    spot_grid = prices[None, None, :]
+    years = ((dte - days) / 365.0)[None, :, None]
+    shift_grid = shifts[:, None, None] / 100.0
+
+    call_vol = np.maximum(call_iv / 100.0 + shift_grid, 0.0)
+    put_vol = np.maximum(put_iv / 100.0 + shift_grid, 0.0)
+    value = (black_scholes('call', spot_grid, call_strike, years, call_vol)
+             + black_scholes('put', spot_grid, put_strike, years, put_vol))
+    pnl = value - (call_price + put_price)
+
+    return prices.round(4), days.round(4), shifts, call_price + put_price, pnl.round(4)
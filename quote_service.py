@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+
+from request_scheduler import PRIORITY_INTERACTIVE, RequestScheduler
+
+
+class QuoteService:
+    """
+    Batched last-price lookup for underlying symbols.
+
+    Fetches quotes for a whole symbol list with a single bulk download
+    instead of one ``Ticker.info`` call per symbol, and keeps them in a
+    short-lived cache so repeated scans do not hit Yahoo again.
+    """
+
+    def __init__(self, ttl=60, scheduler=None):
+        """
+        Initialize the quote service.
+
+        Args:
+            ttl (float): Seconds a fetched quote stays fresh in the cache
+            scheduler (RequestScheduler): Gate for the upstream download
+        """
+        self.ttl = ttl
+        self.scheduler = scheduler or RequestScheduler()
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get_quotes(self, symbols, priority=PRIORITY_INTERACTIVE):
+        """
+        Get the last price for each symbol.
+
+        Args:
+            symbols (list): Ticker symbols to quote
+            priority (int): Scheduler priority of the download, if one is needed
+
+        Returns:
+            dict: Mapping of symbol to last price, or None when no quote
+                could be found for that symbol
+        """
+        now = time.monotonic()
+        quotes = {}
+        stale = []
+
+        with self._lock:
+            for symbol in symbols:
+                cached = self._cache.get(symbol)
+                if cached and now - cached[1] < self.ttl:
+                    quotes[symbol] = cached[0]
+                else:
+                    stale.append(symbol)
+
+        if stale:
+            fetched = self._fetch(stale, priority)
+            fetched_at = time.monotonic()
+            with self._lock:
+                for symbol in stale:
+                    price = fetched.get(symbol)
+                    quotes[symbol] = price
+                    # Missing quotes are not cached so the next call retries them
+                    if price is not None:
+                        self._cache[symbol] = (price, fetched_at)
+
+        return quotes
+
+    def invalidate(self, symbols=None):
+        """Drop cached quotes for the given symbols, or all of them."""
+        with self._lock:
+            if symbols is None:
+                self._cache.clear()
+            else:
+                for symbol in symbols:
+                    self._cache.pop(symbol, None)
+
+    def _fetch(self, symbols, priority):
+        """Download recent daily bars for all symbols in one request."""
+        try:
+            # yfinance fans the batch out per symbol, so charge one token each
+            data = self.scheduler.call(
+                yf.download,
+                symbols,
+                priority=priority,
+                cost=len(symbols),
+                period='5d',
+                interval='1d',
+                group_by='column',
+                auto_adjust=False,
+                progress=False,
+                threads=True,
+            )
+        except Exception as e:
+            print(f"Error fetching quotes for {len(symbols)} symbols: {str(e)}")
+            return {}
+
+        if data is None or data.empty or 'Close' not in data:
+            return {}
+
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(name=symbols[0])
+
+        prices = {}
+        for symbol in symbols:
+            if symbol not in closes:
+                continue
+            series = closes[symbol].dropna()
+            if series.empty:
+                continue
+            price = float(series.iloc[-1])
+            if price > 0:
+                prices[symbol] = price
+        return prices
@@ -0,0 +1,257 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+import requests
+
+try:
+    from curl_cffi.requests.exceptions import RequestException as CurlRequestException
+except ImportError:  # yfinance releases before curl_cffi use plain requests
+    CurlRequestException = requests.exceptions.RequestException
+
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:  # Older yfinance reports rate limits as HTTP 429 errors
+    YFRateLimitError = None
+
+# Priority classes, lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_BACKGROUND: 'background',
+}
+
+# Network and HTTP errors; only these are retried and move the circuit breaker
+UPSTREAM_ERRORS = tuple(
+    error for error in (
+        requests.exceptions.RequestException,
+        CurlRequestException,
+        ConnectionError,
+        TimeoutError,
+        YFRateLimitError,
+    ) if error is not None
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+
+class RequestScheduler:
+    """
+    Token-bucket gate for upstream data calls.
+
+    Every upstream request runs through ``call``. Callers wait for a token
+    in priority order, so interactive scans and charts go ahead of
+    background refreshes. Network and HTTP failures are retried with
+    jittered exponential backoff, and a circuit breaker fails every call
+    fast with CircuitOpenError after repeated failures until a cooldown
+    has passed.
+    """
+
+    def __init__(self, rate=2.0, burst=10, max_retries=3, base_delay=0.5, max_delay=30.0,
+                 failure_threshold=5, cooldown=30.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            rate (float): Tokens added per second (sustained requests/second)
+            burst (int): Bucket size, the most requests allowed back to back
+            max_retries (int): Retries after the first failed attempt
+            base_delay (float): Backoff before the first retry, in seconds
+            max_delay (float): Cap on any single backoff, in seconds
+            failure_threshold (int): Consecutive failures that open the circuit
+            cooldown (float): Seconds the circuit stays open before a trial call
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+        self._circuit = 'closed'
+        self._open_until = 0.0
+        self._trial_in_flight = False
+        self._consecutive_failures = 0
+
+        self._stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'throttle_events': 0,
+            'circuit_opens': 0,
+            'rejected': 0,
+        }
+        self._waits = {priority: {'count': 0, 'total': 0.0, 'max': 0.0} for priority in PRIORITY_NAMES}
+
+    def call(self, fn, *args, priority=PRIORITY_INTERACTIVE, cost=1, **kwargs):
+        """
+        Run an upstream call once a token is available, retrying failures.
+
+        Args:
+            fn (callable): The upstream call
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND
+            cost (int): Tokens the call uses, e.g. one per symbol in a batch
+
+        Returns:
+            The return value of ``fn``; the last error is raised once the
+            retries are used up
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or opens while retrying
+        """
+        attempt = 0
+        while True:
+            self._acquire(priority, cost)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                retryable = self._record_failure(e)
+                if not retryable or attempt >= self.max_retries or self._circuit == 'open':
+                    raise
+                attempt += 1
+                with self._cond:
+                    self._stats['retries'] += 1
+                # Full jitter keeps retrying callers from synchronizing
+                time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+            else:
+                self._record_success()
+                return result
+
+    def stats(self):
+        """Queue depth, wait times, throttle events and circuit state."""
+        with self._cond:
+            self._refill()
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _, _ in self._waiting:
+                depth[PRIORITY_NAMES.get(priority, str(priority))] += 1
+
+            waits = {}
+            for priority, wait in self._waits.items():
+                waits[PRIORITY_NAMES[priority]] = {
+                    'count': wait['count'],
+                    'avg_ms': 1000 * wait['total'] / wait['count'] if wait['count'] else 0.0,
+                    'max_ms': 1000 * wait['max'],
+                }
+
+            return dict(
+                self._stats,
+                queue_depth=depth,
+                wait=waits,
+                tokens=round(self._tokens, 2),
+                circuit=self._circuit,
+                circuit_open_for=max(0.0, round(self._open_until - time.monotonic(), 2)),
+                consecutive_failures=self._consecutive_failures,
+            )
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _acquire(self, priority, cost):
+        cost = min(max(cost, 1), self.burst)
+        enqueued = time.monotonic()
+
+        with self._cond:
+            ticket = (priority, next(self._seq), cost)
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    self._refill()
+                    now = time.monotonic()
+
+                    if self._circuit == 'open' and now >= self._open_until:
+                        self._circuit = 'half_open'
+
+                    if self._circuit == 'open' or self._circuit == 'half_open' and self._trial_in_flight:
+                        self._stats['rejected'] += 1
+                        raise CircuitOpenError(
+                            f"Upstream circuit open, retry in {max(0.0, self._open_until - now):.1f}s"
+                        )
+
+                    if self._waiting[0] is not ticket:
+                        timeout = None
+                    elif self._tokens >= cost:
+                        break
+                    else:
+                        timeout = (cost - self._tokens) / self.rate
+
+                    self._cond.wait(timeout)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                # Let the next caller in line check for a token
+                self._cond.notify_all()
+
+            self._tokens -= cost
+            if self._circuit == 'half_open':
+                self._trial_in_flight = True
+            self._stats['requests'] += 1
+
+            waited = time.monotonic() - enqueued
+            wait = self._waits.setdefault(priority, {'count': 0, 'total': 0.0, 'max': 0.0})
+            wait['count'] += 1
+            wait['total'] += waited
+            wait['max'] = max(wait['max'], waited)
+
+    def _record_success(self):
+        with self._cond:
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            if self._circuit != 'closed':
+                print("Upstream recovered, closing circuit")
+            self._circuit = 'closed'
+            self._cond.notify_all()
+
+    def _record_failure(self, error):
+        """Count a failed call; returns whether it is worth retrying."""
+        if not isinstance(error, UPSTREAM_ERRORS):
+            # Not a network or HTTP error, so it says nothing about upstream health
+            with self._cond:
+                self._trial_in_flight = False
+                if self._circuit == 'half_open':
+                    self._circuit = 'closed'
+                self._cond.notify_all()
+            return False
+
+        throttled = _is_throttle(error)
+        with self._cond:
+            self._stats['failures'] += 1
+            self._trial_in_flight = False
+            if throttled:
+                self._stats['throttle_events'] += 1
+                # Upstream says slow down: spend the whole bucket
+                self._tokens = min(self._tokens, 0.0)
+
+            self._consecutive_failures += 1
+            if self._circuit == 'half_open' or self._consecutive_failures >= self.failure_threshold:
+                if self._circuit != 'open':
+                    self._stats['circuit_opens'] += 1
+                    print(f"Upstream failing ({str(error)}), pausing requests for {self.cooldown}s")
+                self._circuit = 'open'
+                self._open_until = time.monotonic() + self.cooldown
+
+            self._cond.notify_all()
+
+        return True
+
+
+def _is_throttle(error):
+    """Whether an upstream error is a rate-limit response."""
+    if YFRateLimitError is not None and isinstance(error, YFRateLimitError):
+        return True
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None) == 429
@@ -0,0 +1,217 @@
+import hashlib
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from pareto import DEFAULT_OBJECTIVES, pareto_filter, validate_objectives
+
+# Chain columns that strangle results depend on
+CHAIN_COLUMNS = ['strike', 'lastPrice', 'impliedVolatility', 'volume', 'openInterest']
+
+# Numeric strangle fields that can be used as Pareto objectives
+OBJECTIVE_FIELDS = [
+    'current_price', 'dte', 'call_strike', 'put_strike', 'call_price', 'put_price',
+    'call_iv', 'put_iv', 'avg_iv', 'call_volume', 'put_volume', 'call_oi', 'put_oi',
+    'strangle_cost', 'width', 'width_percent', 'upper_breakeven', 'lower_breakeven',
+    'upper_breakeven_pct', 'lower_breakeven_pct',
+    'call_surface_iv', 'put_surface_iv', 'avg_surface_iv',
+]
+
+# Fields scan results can be sorted by: strangle fields plus per-symbol IV fields
+SORT_FIELDS = OBJECTIVE_FIELDS + ['atm_iv', 'iv_rank', 'iv_percentile']
+
+# Scan parameters that must be finite numbers
+NUMERIC_PARAMS = [
+    'min_price', 'max_price', 'min_iv', 'min_volume', 'min_open_interest',
+    'min_dte', 'max_dte', 'min_delta', 'max_delta', 'min_strangle_cost', 'max_strangle_cost',
+    'min_underlying_price', 'max_underlying_price', 'min_iv_rank',
+]
+
+
+def days_to_expiration(exp_date):
+    """Whole days from now until an expiration date string (YYYY-MM-DD)."""
+    exp_datetime = datetime.strptime(exp_date, '%Y-%m-%d')
+    return (exp_datetime - datetime.now()).days
+
+
+def filter_otm_options(options_df, current_price, option_type, params):
+    """
+    Filter one side of a chain to liquid OTM contracts.
+
+    Args:
+        options_df (DataFrame): Calls or puts from an option chain
+        current_price (float): Underlying price
+        option_type (str): 'call' or 'put'
+        params (dict): Scan parameters; with use_surface_iv set, min_iv
+            applies to the surfaceIV column when the chain has one
+
+    Returns:
+        DataFrame: Contracts passing the price, IV and liquidity filters
+    """
+    if option_type == 'call':
+        otm = options_df['strike'] > current_price
+    else:
+        otm = options_df['strike'] < current_price
+
+    iv_column = 'impliedVolatility'
+    if params.get('use_surface_iv') and 'surfaceIV' in options_df:
+        iv_column = 'surfaceIV'
+
+    return options_df[
+        otm &
+        (options_df['lastPrice'] >= params['min_price']) &
+        (options_df['lastPrice'] <= params['max_price']) &
+        (options_df[iv_column] * 100 >= params['min_iv']) &
+        (options_df['volume'] >= params['min_volume']) &
+        (options_df['openInterest'] >= params['min_open_interest'])
+    ]
+
+
+def build_strangles(symbol, current_price, exp_date, dte, otm_calls, otm_puts, params):
+    """
+    Pair every OTM call with every OTM put inside the strangle cost range.
+
+    The cross product is evaluated with numpy; results come out in call-major
+    order, one dict per strangle. Surface-smoothed IVs are included when
+    both chain sides carry a surfaceIV column.
+    """
+    if otm_calls.empty or otm_puts.empty:
+        return []
+
+    call_price = otm_calls['lastPrice'].to_numpy(dtype=float)
+    put_price = otm_puts['lastPrice'].to_numpy(dtype=float)
+    cost = call_price[:, None] + put_price[None, :]
+    call_idx, put_idx = np.nonzero(
+        (cost >= params['min_strangle_cost']) & (cost <= params['max_strangle_cost'])
+    )
+    if len(call_idx) == 0:
+        return []
+
+    calls = otm_calls.iloc[call_idx]
+    puts = otm_puts.iloc[put_idx]
+    call_strike = calls['strike'].to_numpy(dtype=float)
+    put_strike = puts['strike'].to_numpy(dtype=float)
+    call_iv = calls['impliedVolatility'].to_numpy(dtype=float)
+    put_iv = puts['impliedVolatility'].to_numpy(dtype=float)
+    strangle_cost = cost[call_idx, put_idx]
+
+    width = call_strike - put_strike
+    upper_breakeven = call_strike + strangle_cost
+    lower_breakeven = put_strike - strangle_cost
+
+    columns = {
+        'call_strike': call_strike,
+        'put_strike': put_strike,
+        'call_price': call_price[call_idx],
+        'put_price': put_price[put_idx],
+        'call_iv': call_iv * 100,
+        'put_iv': put_iv * 100,
+        'avg_iv': (call_iv + put_iv) * 50,
+        'call_volume': calls['volume'].to_numpy(),
+        'put_volume': puts['volume'].to_numpy(),
+        'call_oi': calls['openInterest'].to_numpy(),
+        'put_oi': puts['openInterest'].to_numpy(),
+        'strangle_cost': strangle_cost,
+        'width': width,
+        'width_percent': (width / current_price) * 100,
+        'upper_breakeven': upper_breakeven,
+        'lower_breakeven': lower_breakeven,
+        'upper_breakeven_pct': ((upper_breakeven / current_price) - 1) * 100,
+        'lower_breakeven_pct': (1 - (lower_breakeven / current_price)) * 100,
+    }
+
+    if 'surfaceIV' in calls and 'surfaceIV' in puts:
+        call_surface_iv = calls['surfaceIV'].to_numpy(dtype=float)
+        put_surface_iv = puts['surfaceIV'].to_numpy(dtype=float)
+        columns['call_surface_iv'] = call_surface_iv * 100
+        columns['put_surface_iv'] = put_surface_iv * 100
+        columns['avg_surface_iv'] = (call_surface_iv + put_surface_iv) * 50
+
+    names = list(columns)
+    rows = zip(*(values.tolist() for values in columns.values()))
+
+    return [
+        {
+            'symbol': symbol,
+            'current_price': current_price,
+            'expiration': exp_date,
+            'dte': dte,
+            **dict(zip(names, row)),
+        }
+        for row in rows
+    ]
+
+
+def apply_pareto(strangles, params):
+    """Apply the optional per-expiration Pareto filter from scan params."""
+    if not params.get('pareto_only'):
+        return strangles
+    objectives = params.get('pareto_objectives') or DEFAULT_OBJECTIVES
+    return pareto_filter(strangles, objectives)
+
+
+def validate_pareto_params(params):
+    """Raise ValueError if the scan params ask for invalid Pareto objectives."""
+    if params.get('pareto_only') and params.get('pareto_objectives'):
+        validate_objectives(params['pareto_objectives'], OBJECTIVE_FIELDS)
+
+
+def validate_scan_params(params):
+    """
+    Check scan params before they are used or saved.
+
+    Returns:
+        dict: Copy of the params with numeric strings coerced to floats
+
+    Raises:
+        ValueError: If a numeric param is not a finite number, sort_by is
+            not a sortable field or the Pareto objectives are invalid
+    """
+    if not isinstance(params, dict):
+        raise ValueError("Scan params must be an object")
+
+    checked = dict(params)
+    for name in NUMERIC_PARAMS:
+        if name not in checked:
+            continue
+        value = checked[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a number, got {checked[name]!r}")
+        if not math.isfinite(value):
+            raise ValueError(f"{name} must be finite")
+        checked[name] = value
+
+    sort_by = checked.get('sort_by')
+    if sort_by is not None and (not isinstance(sort_by, str) or sort_by not in SORT_FIELDS):
+        raise ValueError(f"Cannot sort by {sort_by!r}")
+
+    validate_pareto_params(checked)
+    return checked
+
+
+def find_strangles(symbol, current_price, exp_date, dte, calls_df, puts_df, params):
+    """Run the full strangle search for one option chain expiration."""
+    otm_calls = filter_otm_options(calls_df, current_price, 'call', params)
+    otm_puts = filter_otm_options(puts_df, current_price, 'put', params)
+    strangles = build_strangles(symbol, current_price, exp_date, dte, otm_calls, otm_puts, params)
+    return apply_pareto(strangles, params)
+
+
+def strangle_key(strangle):
+    """Identity of a strangle across refreshes."""
+    return (strangle['symbol'], strangle['expiration'], strangle['call_strike'], strangle['put_strike'])
+
+
+def chain_fingerprint(current_price, dte, calls_df, puts_df):
+    """Hash of everything a chain's strangle results depend on."""
+    digest = hashlib.sha1(f"{current_price}:{dte}".encode())
+    for options_df in (calls_df, puts_df):
+        columns = [c for c in CHAIN_COLUMNS if c in options_df]
+        hashed = pd.util.hash_pandas_object(options_df[columns], index=False)
+        digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
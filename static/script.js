@@ -11,10 +11,17 @@ document.addEventListener('DOMContentLoaded', function() {
     const scannerSection = document.getElementById('scannerSection');
     const ordersSection = document.getElementById('ordersSection');
     const refreshOrdersBtn = document.getElementById('refreshOrdersBtn');
+    const ivShiftSelect = document.getElementById('ivShiftSelect');
+    const resultsContainer = resultsTable.closest('.table-responsive');
+    const resultsFilter = document.getElementById('resultsFilter');
+    const resultsCount = document.getElementById('resultsCount');
     
     // Current selected trade data
     let selectedTrade = null;
     
+    // Last loaded payoff surface, redrawn locally when the IV shift changes
+    let payoffSurface = null;
+    
     // Navigation between scanner and orders
     ordersNavLink.addEventListener('click', function(e) {
         e.preventDefault();
@@ -93,10 +100,14 @@ document.addEventListener('DOMContentLoaded', function() {
             max_strangle_cost: parseFloat(document.getElementById('maxStrangleCost').value),
             min_underlying_price: parseFloat(document.getElementById('minUnderlyingPrice').value),
             max_underlying_price: parseFloat(document.getElementById('maxUnderlyingPrice').value),
+            use_surface_iv: document.getElementById('useSurfaceIv').checked,
+            min_iv_rank: parseFloat(document.getElementById('minIvRank').value) || 0,
+            pareto_only: document.getElementById('paretoOnly').checked,
         };
         
-        // Make API request
-        fetch('/api/scan', {
+        // Start a background scan job and poll it; the server paces
+        // upstream requests, so a full symbol list can take minutes
+        fetch('/api/scan/jobs', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -104,13 +115,25 @@ document.addEventListener('DOMContentLoaded', function() {
             body: JSON.stringify({ symbols, params }),
         })
         .then(response => response.json())
-        .then(data => {
-            // Update status
-            scanStatus.textContent = `Found ${data.length} results`;
-            scanStatus.className = 'badge bg-success';
+        .then(job => {
+            if (job.error) throw new Error(job.error);
+            return pollScanJob(job.id);
+        })
+        .then(job => {
+            const skipped = Object.keys(job.skipped);
+            
+            // Update status, listing any symbols that could not be scanned
+            scanStatus.textContent = `Found ${job.results.length} results`;
+            if (skipped.length) {
+                scanStatus.textContent += ` (${skipped.length} symbols skipped)`;
+                scanStatus.title = skipped.map(symbol => `${symbol}: ${job.skipped[symbol]}`).join('\n');
+            } else {
+                scanStatus.title = '';
+            }
+            scanStatus.className = skipped.length ? 'badge bg-warning' : 'badge bg-success';
             
             // Update table
-            updateResultsTable(data);
+            updateResultsTable(job.results);
         })
         .catch(error => {
             console.error('Error:', error);
@@ -122,90 +145,248 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
-    // Update results table
+    // Poll a scan job until it finishes, showing progress meanwhile
+    const SCAN_POLL_MS = 1000;
+    function pollScanJob(jobId) {
+        return fetch(`/api/scan/jobs/${jobId}`)
+            .then(response => response.json())
+            .then(job => {
+                if (job.status === 'done') return job;
+                if (job.status !== 'running') throw new Error(job.error || 'Scan failed');
+                scanStatus.textContent = `Scanning... ${job.scanned}/${job.total}`;
+                return new Promise(resolve => setTimeout(resolve, SCAN_POLL_MS))
+                    .then(() => pollScanJob(jobId));
+            });
+    }
+    
+    // Result columns: field, how to render it, and optional cell class
+    const formatCurrency = num => '$' + num.toFixed(2);
+    const formatPercent = num => num.toFixed(2) + '%';
+    const RESULT_COLUMNS = [
+        { key: 'symbol', format: v => v },
+        { key: 'expiration', format: v => v },
+        { key: 'dte', format: v => v },
+        { key: 'call_strike', format: v => v.toFixed(2) },
+        { key: 'put_strike', format: v => v.toFixed(2) },
+        { key: 'width_percent', format: formatPercent },
+        { key: 'strangle_cost', format: formatCurrency },
+        { key: 'avg_iv', format: formatPercent },
+        { key: 'upper_breakeven_pct', format: formatPercent, className: v => v > 10 ? 'positive' : '' },
+        { key: 'lower_breakeven_pct', format: formatPercent, className: v => v > 10 ? 'positive' : '' },
+        { key: 'iv_rank', format: v => v === null || v === undefined ? '&ndash;' : v.toFixed(0) },
+    ];
+    
+    // Extra rows rendered above and below the visible window
+    const ROW_BUFFER = 10;
+    
+    // Loaded scan results and the sorted/filtered view of them
+    let allResults = [];
+    let viewResults = [];
+    let sortKey = null;
+    let sortAscending = true;
+    let highlightedResult = null;
+    let rowHeight = 37;
+    let renderPending = false;
+    
+    // Update results table with a new scan
     function updateResultsTable(data) {
-        const tbody = resultsTable.querySelector('tbody');
-        tbody.innerHTML = '';
+        allResults = data;
+        highlightedResult = null;
+        resultsContainer.scrollTop = 0;
+        applyResultsView();
+    }
+    
+    // Re-apply the client-side filter and sort, then redraw
+    function applyResultsView() {
+        const predicates = parseResultsFilter(resultsFilter.value);
+        viewResults = predicates.length ?
+            allResults.filter(item => predicates.every(matches => matches(item))) :
+            allResults.slice();
         
-        if (data.length === 0) {
-            const row = document.createElement('tr');
-            row.innerHTML = '<td colspan="11" class="text-center">No results found</td>';
-            tbody.appendChild(row);
-            return;
+        if (sortKey) {
+            const direction = sortAscending ? 1 : -1;
+            viewResults.sort((a, b) => {
+                const x = a[sortKey];
+                const y = b[sortKey];
+                if (x === y) return 0;
+                // Missing values always sort last
+                if (x === null || x === undefined) return 1;
+                if (y === null || y === undefined) return -1;
+                return (x < y ? -1 : 1) * direction;
+            });
+        }
+        
+        resultsTable.querySelectorAll('th[data-sort]').forEach(th => {
+            th.classList.toggle('sort-asc', th.dataset.sort === sortKey && sortAscending);
+            th.classList.toggle('sort-desc', th.dataset.sort === sortKey && !sortAscending);
+        });
+        
+        if (allResults.length) {
+            resultsCount.textContent = viewResults.length === allResults.length ?
+                `${allResults.length} results` :
+                `Showing ${viewResults.length} of ${allResults.length} results`;
+        } else {
+            resultsCount.textContent = '';
         }
         
-        data.forEach(item => {
-            const row = document.createElement('tr');
+        renderVisibleRows();
+    }
+    
+    // Parse filter text like "AAPL dte<30 avg_iv>=50" into row predicates
+    function parseResultsFilter(text) {
+        return text.trim().split(/\s+/).filter(token => token).map(token => {
+            const match = token.match(/^(\w+)(>=|<=|!=|=|>|<|:)(.+)$/);
             
-            // Format numbers
-            const formatCurrency = num => '$' + num.toFixed(2);
-            const formatPercent = num => num.toFixed(2) + '%';
+            if (!match) {
+                // Bare words match the symbol or expiration
+                const needle = token.toUpperCase();
+                return item => item.symbol.toUpperCase().includes(needle) || item.expiration.includes(token);
+            }
+            
+            const [, key, op, raw] = match;
+            const number = parseFloat(raw);
+            const numeric = !isNaN(number) && op !== ':';
             
-            row.innerHTML = `
-                <td>${item.symbol}</td>
-                <td>${item.expiration}</td>
-                <td>${item.dte}</td>
-                <td>${item.call_strike.toFixed(2)}</td>
-                <td>${item.put_strike.toFixed(2)}</td>
-                <td>${formatPercent(item.width_percent)}</td>
-                <td>${formatCurrency(item.strangle_cost)}</td>
-                <td>${formatPercent(item.avg_iv)}</td>
-                <td class="${item.upper_breakeven_pct > 10 ? 'positive' : ''}">${formatPercent(item.upper_breakeven_pct)}</td>
-                <td class="${item.lower_breakeven_pct > 10 ? 'positive' : ''}">${formatPercent(item.lower_breakeven_pct)}</td>
+            return item => {
+                const value = item[key];
+                if (value === undefined) return false;
+                if (!numeric) return String(value).toUpperCase().includes(raw.toUpperCase()) === (op !== '!=');
+                switch (op) {
+                    case '>': return value > number;
+                    case '<': return value < number;
+                    case '>=': return value >= number;
+                    case '<=': return value <= number;
+                    case '!=': return value !== number;
+                    default: return value === number;
+                }
+            };
+        });
+    }
+    
+    // Render only the rows inside the scroll window, padded with spacer rows
+    function renderVisibleRows() {
+        const tbody = resultsTable.querySelector('tbody');
+        
+        if (viewResults.length === 0) {
+            const message = allResults.length ? 'No results match the filter' : 'No results found';
+            tbody.innerHTML = `<tr><td colspan="12" class="text-center">${message}</td></tr>`;
+            return;
+        }
+        
+        const total = viewResults.length;
+        const viewport = resultsContainer.clientHeight || 500;
+        const scrollTop = resultsContainer.scrollTop;
+        const first = Math.max(0, Math.floor(scrollTop / rowHeight) - ROW_BUFFER);
+        const last = Math.min(total, Math.ceil((scrollTop + viewport) / rowHeight) + ROW_BUFFER);
+        
+        const rows = [spacerRow(first * rowHeight)];
+        for (let i = first; i < last; i++) {
+            rows.push(resultRow(viewResults[i], i));
+        }
+        rows.push(spacerRow((total - last) * rowHeight));
+        tbody.innerHTML = rows.join('');
+        
+        // Use the real row height once rows are on screen
+        const sample = tbody.querySelector('tr[data-index]');
+        if (sample && sample.offsetHeight && Math.abs(sample.offsetHeight - rowHeight) > 0.5) {
+            rowHeight = sample.offsetHeight;
+            renderVisibleRows();
+        }
+    }
+    
+    function spacerRow(height) {
+        return height > 0 ? `<tr class="spacer-row" style="height: ${height}px"><td colspan="12"></td></tr>` : '';
+    }
+    
+    function resultRow(item, index) {
+        const cells = RESULT_COLUMNS.map(column => {
+            const value = item[column.key];
+            const className = column.className ? column.className(value) : '';
+            return `<td class="${className}">${column.format(value)}</td>`;
+        }).join('');
+        
+        return `
+            <tr data-index="${index}" class="${index % 2 ? '' : 'row-odd'} ${item === highlightedResult ? 'highlight-row' : ''}">
+                ${cells}
                 <td>
-                    <button class="btn btn-sm btn-primary view-chart" data-symbol="${item.symbol}">
+                    <button class="btn btn-sm btn-primary view-chart">
                         <i class="bi bi-graph-up"></i>
                     </button>
                     <button class="btn btn-sm btn-warning trade-btn" data-bs-toggle="modal" data-bs-target="#tradeModal">
                         <i class="bi bi-currency-dollar"></i>
                     </button>
                 </td>
-            `;
-            
-            tbody.appendChild(row);
-            
-            // Store the data in the row for reference
-            row.dataset.item = JSON.stringify(item);
+            </tr>
+        `;
+    }
+    
+    // Redraw the window on scroll, at most once per frame
+    resultsContainer.addEventListener('scroll', function() {
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => {
+            renderPending = false;
+            renderVisibleRows();
         });
+    });
+    
+    // Sort by a column when its header is clicked, toggling direction
+    resultsTable.querySelector('thead').addEventListener('click', function(e) {
+        const th = e.target.closest('th[data-sort]');
+        if (!th) return;
         
-        // Add event listeners to buttons
-        document.querySelectorAll('.view-chart').forEach(button => {
-            button.addEventListener('click', function() {
-                const symbol = this.getAttribute('data-symbol');
-                loadChart(symbol);
-                
-                // Highlight the selected row
-                document.querySelectorAll('#resultsTable tbody tr').forEach(row => {
-                    row.classList.remove('highlight-row');
-                });
-                this.closest('tr').classList.add('highlight-row');
-            });
-        });
+        if (sortKey === th.dataset.sort) {
+            sortAscending = !sortAscending;
+        } else {
+            sortKey = th.dataset.sort;
+            sortAscending = true;
+        }
+        applyResultsView();
+    });
+    
+    resultsFilter.addEventListener('input', function() {
+        resultsContainer.scrollTop = 0;
+        applyResultsView();
+    });
+    
+    // One delegated handler for the chart and trade buttons of every row
+    resultsTable.querySelector('tbody').addEventListener('click', function(e) {
+        const button = e.target.closest('.view-chart, .trade-btn');
+        if (!button) return;
         
-        document.querySelectorAll('.trade-btn').forEach(button => {
-            button.addEventListener('click', function() {
-                const row = this.closest('tr');
-                const item = JSON.parse(row.dataset.item);
-                selectedTrade = item;
-                
-                // Populate trade details
-                const tradeDetails = document.getElementById('tradeDetails');
-                tradeDetails.innerHTML = `
-                    <tr><td>Symbol:</td><td><strong>${item.symbol}</strong></td></tr>
-                    <tr><td>Strategy:</td><td>Strangle</td></tr>
-                    <tr><td>Expiration:</td><td>${item.expiration} (${item.dte} days)</td></tr>
-                    <tr><td>Call Leg:</td><td>${item.call_strike} Strike @ ${item.call_price.toFixed(2)}</td></tr>
-                    <tr><td>Put Leg:</td><td>${item.put_strike} Strike @ ${item.put_price.toFixed(2)}</td></tr>
-                    <tr><td>Total Cost:</td><td>$${item.strangle_cost.toFixed(2)} per share</td></tr>
-                    <tr><td>Implied Volatility:</td><td>${item.avg_iv.toFixed(2)}%</td></tr>
-                    <tr><td>Breakeven Points:</td><td>Above ${item.upper_breakeven.toFixed(2)} or Below ${item.lower_breakeven.toFixed(2)}</td></tr>
-                `;
-                
-                // Set default limit price if applicable
-                document.getElementById('limitPrice').value = item.strangle_cost.toFixed(2);
-            });
-        });
-    }
+        const row = button.closest('tr');
+        const item = viewResults[parseInt(row.dataset.index)];
+        if (!item) return;
+        
+        if (button.classList.contains('view-chart')) {
+            loadChart(item.symbol);
+            loadPayoff(item);
+            
+            // Highlight the selected row
+            highlightedResult = item;
+            this.querySelectorAll('tr.highlight-row').forEach(r => r.classList.remove('highlight-row'));
+            row.classList.add('highlight-row');
+            return;
+        }
+        
+        selectedTrade = item;
+        
+        // Populate trade details
+        const tradeDetails = document.getElementById('tradeDetails');
+        tradeDetails.innerHTML = `
+            <tr><td>Symbol:</td><td><strong>${item.symbol}</strong></td></tr>
+            <tr><td>Strategy:</td><td>Strangle</td></tr>
+            <tr><td>Expiration:</td><td>${item.expiration} (${item.dte} days)</td></tr>
+            <tr><td>Call Leg:</td><td>${item.call_strike} Strike @ ${item.call_price.toFixed(2)}</td></tr>
+            <tr><td>Put Leg:</td><td>${item.put_strike} Strike @ ${item.put_price.toFixed(2)}</td></tr>
+            <tr><td>Total Cost:</td><td>$${item.strangle_cost.toFixed(2)} per share</td></tr>
+            <tr><td>Implied Volatility:</td><td>${item.avg_iv.toFixed(2)}%</td></tr>
+            <tr><td>Breakeven Points:</td><td>Above ${item.upper_breakeven.toFixed(2)} or Below ${item.lower_breakeven.toFixed(2)}</td></tr>
+        `;
+        
+        // Set default limit price if applicable
+        document.getElementById('limitPrice').value = item.strangle_cost.toFixed(2);
+    });
     
     // Load chart for a symbol
     function loadChart(symbol) {
@@ -231,6 +412,64 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Load the P&L surface for a strangle
+    function loadPayoff(item) {
+        fetch('/api/payoff', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ strangle: item }),
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                console.error('Payoff error:', data.error);
+                return;
+            }
+            
+            payoffSurface = data;
+            payoffSurface.title = `${item.symbol} ${item.expiration} ${item.put_strike}/${item.call_strike} Strangle`;
+            
+            // Offer every IV shift in the surface, defaulting to no shift
+            ivShiftSelect.innerHTML = data.iv_shifts.map((shift, i) =>
+                `<option value="${i}" ${shift === 0 ? 'selected' : ''}>IV ${shift > 0 ? '+' : ''}${shift} pts</option>`
+            ).join('');
+            ivShiftSelect.disabled = false;
+            
+            drawPayoff();
+        })
+        .catch(error => {
+            console.error('Error loading payoff:', error);
+        });
+    }
+    
+    // Draw the loaded P&L surface for the selected IV shift
+    function drawPayoff() {
+        if (!payoffSurface) return;
+        
+        const shiftIndex = parseInt(ivShiftSelect.value) || 0;
+        const heatmap = {
+            type: 'heatmap',
+            x: payoffSurface.prices,
+            y: payoffSurface.days,
+            z: payoffSurface.pnl[shiftIndex],
+            colorscale: 'RdBu',
+            zmid: 0,
+            colorbar: { title: 'P&L' },
+            hovertemplate: 'Price %{x:.2f}<br>Day %{y:.0f}<br>P&L %{z:.2f}<extra></extra>'
+        };
+        const layout = {
+            title: payoffSurface.title,
+            xaxis: { title: 'Underlying Price' },
+            yaxis: { title: 'Days Elapsed' }
+        };
+        
+        Plotly.react('payoffChart', [heatmap], layout);
+    }
+    
+    ivShiftSelect.addEventListener('change', drawPayoff);
+    
     // Load orders from API
     function loadOrders() {
         const ordersTable = document.getElementById('ordersTable').querySelector('tbody');
@@ -281,8 +520,12 @@ document.addEventListener('DOMContentLoaded', function() {
                                 statusBadge = '<span class="badge bg-primary">New</span>';
                                 break;
                             case 'cancelled':
+                            case 'canceled':
                                 statusBadge = '<span class="badge bg-secondary">Cancelled</span>';
                                 break;
+                            case 'expired':
+                                statusBadge = '<span class="badge bg-secondary">Expired</span>';
+                                break;
                             case 'rejected':
                                 statusBadge = '<span class="badge bg-danger">Rejected</span>';
                                 break;
@@ -0,0 +1,205 @@
+from datetime import datetime
+
+import pytest
+
+from execution_simulator import SYNTHETIC_DEPTH, SimulatedOptionsTrader
+
+MORNING = datetime(2025, 4, 1, 10, 0)
+CALL = 'AAPL250417C00180000'
+PUT = 'AAPL250417P00160000'
+
+
+def strangle(quantity=1, order_type='market', time_in_force='day', limit_price=None, side='buy'):
+    request = {
+        'symbol': 'AAPL',
+        'strategy': 'strangle',
+        'quantity': quantity,
+        'order_type': order_type,
+        'time_in_force': time_in_force,
+        'legs': [
+            {'option_type': 'call', 'strike': 180, 'expiration': '2025-04-17', 'price': 2.0, 'side': side},
+            {'option_type': 'put', 'strike': 160, 'expiration': '2025-04-17', 'price': 1.0, 'side': side},
+        ],
+    }
+    if limit_price is not None:
+        request['limit_price'] = limit_price
+    return request
+
+
+def quoted_trader(call=(1.9, 2.1, 10, 10), put=(0.9, 1.1, 10, 10), **kwargs):
+    trader = SimulatedOptionsTrader(now=MORNING, **kwargs)
+    trader.update_quote(CALL, *call)
+    trader.update_quote(PUT, *put)
+    return trader
+
+
+def test_market_order_fills_at_the_ask():
+    trader = quoted_trader()
+    result = trader.execute_strangle(strangle(quantity=2))
+
+    assert result['order_status'] == 'filled'
+    assert result['filled_avg_price'] == pytest.approx(3.2)
+    assert trader.get_account()['cash'] == pytest.approx(100000 - 2 * 3.2 * 100)
+
+
+def test_partial_fill_limited_by_quoted_size():
+    trader = quoted_trader(put=(0.9, 1.1, 10, 3))
+    result = trader.execute_strangle(strangle(quantity=5))
+    assert result['order_status'] == 'partially_filled'
+    assert result['filled_qty'] == 3
+
+    # More size on the short side fills the remainder
+    assert trader.update_quote(PUT, 0.9, 1.1, 10, 10) == 1
+    order = trader.get_orders()['orders'][0]
+    assert order['status'] == 'filled'
+    assert order['filled_qty'] == 5
+
+
+def test_limit_order_rests_until_price_crosses():
+    trader = quoted_trader()
+    result = trader.execute_strangle(strangle(order_type='limit', limit_price=3.0))
+    assert result['order_status'] == 'new'
+
+    # Call ask 1.95 + put ask 1.1 = 3.05, still above the limit
+    assert trader.update_quote(CALL, 1.8, 1.95) == 0
+    assert trader.update_quote(CALL, 1.7, 1.85) == 1
+    order = trader.get_orders()['orders'][0]
+    assert order['status'] == 'filled'
+    assert order['filled_price'] == pytest.approx(2.95)
+
+
+def test_ioc_remainder_is_cancelled():
+    trader = quoted_trader(call=(1.9, 2.1, 10, 2))
+    result = trader.execute_strangle(strangle(quantity=5, time_in_force='ioc'))
+
+    assert result['order_status'] == 'canceled'
+    assert result['filled_qty'] == 2
+    assert trader.get_account()['open_orders'] == 0
+
+
+def test_day_order_expires_after_session_close():
+    trader = quoted_trader()
+    trader.execute_strangle(strangle(order_type='limit', limit_price=1.0))
+    gtc = trader.execute_strangle(strangle(order_type='limit', limit_price=1.0, time_in_force='gtc'))
+
+    assert trader.advance_time(datetime(2025, 4, 1, 15, 59)) == 0
+    assert trader.advance_time(datetime(2025, 4, 1, 16, 1)) == 1
+    statuses = {order['id']: order['status'] for order in trader.get_orders()['orders']}
+    assert statuses[gtc['order_id']] == 'new'
+    assert sorted(statuses.values()) == ['expired', 'new']
+
+
+def test_day_order_expires_on_wall_clock_reads():
+    trader = quoted_trader()
+    result = trader.execute_strangle(strangle(order_type='limit', limit_price=1.0))
+
+    # Nothing calls advance_time; reading orders after the close expires it
+    trader._now = datetime(2025, 4, 2, 9, 30)
+    assert trader.get_orders()['orders'][0]['status'] == 'expired'
+    assert trader.get_account()['open_orders'] == 0
+    assert result['order_status'] == 'new'
+
+
+def test_synthetic_depth_is_refilled_per_order():
+    trader = SimulatedOptionsTrader(now=MORNING)
+    statuses = [trader.execute_strangle(strangle())['order_status'] for _ in range(SYNTHETIC_DEPTH + 10)]
+    assert statuses.count('filled') == SYNTHETIC_DEPTH + 10
+
+
+def test_synthetic_depth_refill_fills_resting_orders_first():
+    trader = SimulatedOptionsTrader(now=MORNING)
+    first = trader.execute_strangle(strangle(quantity=SYNTHETIC_DEPTH + 5))
+    assert first['filled_qty'] == SYNTHETIC_DEPTH
+
+    trader.advance_time(datetime(2025, 4, 1, 11, 0))
+    assert trader.get_orders()['orders'][0]['status'] == 'filled'
+
+
+def test_rejects_non_positive_quantity():
+    trader = quoted_trader()
+    for quantity in (0, -1):
+        with pytest.raises(ValueError):
+            trader.execute_strangle(strangle(quantity=quantity))
+
+
+def test_rejects_order_beyond_cash():
+    trader = quoted_trader(starting_cash=1000)
+    with pytest.raises(ValueError):
+        trader.execute_strangle(strangle(quantity=4))
+
+    # A resting order is only filled as far as the remaining cash covers
+    trader.execute_strangle(strangle(quantity=3, order_type='limit', limit_price=3.0))
+    trader.execute_strangle(strangle(quantity=1))
+    assert trader.get_account()['cash'] == pytest.approx(680)
+
+    trader.update_quote(CALL, 1.8, 1.9)
+    resting = trader.get_orders()['orders'][1]
+    assert resting['status'] == 'partially_filled'
+    assert resting['filled_qty'] == 2
+    assert trader.get_account()['cash'] == pytest.approx(80)
+
+
+def test_position_average_price():
+    trader = quoted_trader()
+    trader.execute_strangle(strangle(quantity=2))
+    trader.update_quote(CALL, 2.9, 3.1)
+    trader.update_quote(PUT, 0.4, 0.6)
+    trader.execute_strangle(strangle(quantity=2))
+
+    positions = {p['symbol']: p for p in trader.get_positions()['positions']}
+    assert positions[CALL]['qty'] == 4
+    assert positions[CALL]['avg_entry_price'] == pytest.approx(2.6)
+    assert positions[PUT]['avg_entry_price'] == pytest.approx(0.85)
+
+    # Selling more than held flips the position at the sale price
+    trader.execute_strangle(strangle(quantity=6, side='sell'))
+    positions = {p['symbol']: p for p in trader.get_positions()['positions']}
+    assert positions[CALL]['qty'] == -2
+    assert positions[CALL]['avg_entry_price'] == pytest.approx(2.9)
+    assert positions[PUT]['avg_entry_price'] == pytest.approx(0.4)
+
+
+def test_closing_position_removes_it():
+    trader = quoted_trader()
+    trader.execute_strangle(strangle(quantity=1))
+    trader.execute_strangle(strangle(quantity=1, side='sell'))
+    assert trader.get_positions()['positions'] == []
+
+
+def test_resting_orders_fill_in_price_time_priority():
+    trader = quoted_trader()
+    low = trader.execute_strangle(strangle(order_type='limit', limit_price=3.0))
+    high = trader.execute_strangle(strangle(order_type='limit', limit_price=3.1))
+    also_low = trader.execute_strangle(strangle(order_type='limit', limit_price=3.0))
+    assert trader.get_account()['open_orders'] == 3
+
+    # One contract at 2.9 + 1.1 = 3.0: the higher limit goes first
+    assert trader.update_quote(CALL, 1.8, 1.9, 10, 1) == 1
+    # Then the earlier of the two equal limits
+    assert trader.update_quote(CALL, 1.8, 1.9, 10, 1) == 1
+    statuses = {order['id']: order['status'] for order in trader.get_orders()['orders']}
+    assert statuses == {high['order_id']: 'filled', low['order_id']: 'filled', also_low['order_id']: 'new'}
+    assert trader.get_account()['open_orders'] == 1
+
+
+def test_rejects_unusable_quotes():
+    trader = quoted_trader()
+    for bid, ask, size in ((float('nan'), float('nan'), 10), (2.2, 2.1, 10), (1.9, float('inf'), 10), (1.9, 2.1, -1)):
+        with pytest.raises(ValueError):
+            trader.update_quote(CALL, bid, ask, size, size)
+
+    trader.execute_strangle(strangle())
+    assert trader.get_account()['cash'] == pytest.approx(100000 - 3.2 * 100)
+
+
+def test_load_chain_skips_rows_without_a_usable_quote():
+    import pandas as pd
+
+    trader = SimulatedOptionsTrader(now=MORNING)
+    calls = pd.DataFrame({'strike': [180.0, 185.0], 'bid': [1.9, float('nan')], 'ask': [2.1, float('nan')]})
+    puts = pd.DataFrame({'strike': [160.0, 155.0], 'bid': [0.9, 0.0], 'ask': [1.1, 0.0]})
+    assert trader.load_chain('AAPL', '2025-04-17', calls, puts) == 2
+
+    result = trader.execute_strangle(strangle())
+    assert result['filled_avg_price'] == pytest.approx(3.2)
+    assert trader.get_account()['cash'] == pytest.approx(100000 - 3.2 * 100)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from pareto import pareto_filter, pareto_mask, validate_objectives
+
+
+def brute_force_mask(points):
+    """Non-dominated rows by comparing every pair."""
+    no_worse = (points[:, None, :] <= points[None, :, :]).all(axis=2)
+    better = (points[:, None, :] < points[None, :, :]).any(axis=2)
+    return ~(no_worse & better).any(axis=0)
+
+
+@pytest.mark.parametrize('dims', [1, 2, 3, 4, 5])
+@pytest.mark.parametrize('size', [1, 2, 7, 150, 1200])
+def test_pareto_mask_matches_brute_force(dims, size):
+    rng = np.random.default_rng(dims * 10000 + size)
+    continuous = rng.random((size, dims))
+    # Few distinct values give plenty of ties and duplicate rows
+    discrete = rng.integers(0, 4, (size, dims)).astype(float)
+
+    for points in (continuous, discrete):
+        np.testing.assert_array_equal(pareto_mask(points), brute_force_mask(points))
+
+
+def test_pareto_mask_large_front():
+    rng = np.random.default_rng(1)
+    points = rng.random((3000, 3))
+    # Every row on the plane x + y + z + w = 3 is efficient
+    points = np.column_stack((points, 3 - points.sum(axis=1)))
+    assert pareto_mask(points).all()
+
+
+def test_pareto_filter_directions_and_duplicates():
+    strangles = [
+        {'cost': 1.0, 'iv': 50.0},
+        {'cost': 2.0, 'iv': 60.0},
+        {'cost': 2.0, 'iv': 40.0},
+        {'cost': 1.0, 'iv': 50.0},
+    ]
+    kept = pareto_filter(strangles, [('cost', 'min'), ('iv', 'max')])
+    assert kept == [strangles[0], strangles[1], strangles[3]]
+
+
+@pytest.mark.parametrize('objectives', [
+    [],
+    'avg_iv',
+    [('avg_iv',)],
+    [('avg_iv', 'up')],
+    [('not_a_field', 'max')],
+])
+def test_validate_objectives_rejects(objectives):
+    with pytest.raises(ValueError):
+        validate_objectives(objectives, ['avg_iv'])
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from request_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    CircuitOpenError,
+    RequestScheduler,
+    _is_throttle,
+)
+
+
+def failing(error):
+    def fn():
+        raise error
+    return fn
+
+
+def test_burst_then_rate_limited():
+    scheduler = RequestScheduler(rate=20.0, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        scheduler.call(lambda: None)
+    assert time.monotonic() - start < 0.03
+
+    # The bucket is empty, so the next two calls wait one refill each
+    scheduler.call(lambda: None)
+    scheduler.call(lambda: None)
+    assert time.monotonic() - start >= 0.09
+    assert scheduler.stats()['requests'] == 5
+
+
+def test_cost_spends_several_tokens():
+    scheduler = RequestScheduler(rate=20.0, burst=4)
+    scheduler.call(lambda: None, cost=4)
+    start = time.monotonic()
+    scheduler.call(lambda: None, cost=2)
+    assert time.monotonic() - start >= 0.09
+
+
+def test_interactive_goes_ahead_of_background():
+    scheduler = RequestScheduler(rate=10.0, burst=1)
+    scheduler.call(lambda: None)
+    order = []
+
+    def submit(name, priority):
+        scheduler.call(order.append, name, priority=priority)
+
+    background = threading.Thread(target=submit, args=('background', PRIORITY_BACKGROUND))
+    background.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=submit, args=('interactive', PRIORITY_INTERACTIVE))
+    interactive.start()
+    background.join()
+    interactive.join()
+
+    assert order == ['interactive', 'background']
+
+
+def test_network_errors_are_retried():
+    scheduler = RequestScheduler(rate=1000.0, burst=10, base_delay=0.001)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise requests.exceptions.ConnectionError("connection reset")
+        return 'ok'
+
+    assert scheduler.call(flaky) == 'ok'
+    assert len(attempts) == 3
+    assert scheduler.stats()['retries'] == 2
+
+
+def test_other_errors_propagate_without_retry_or_breaker():
+    scheduler = RequestScheduler(rate=1000.0, burst=10, failure_threshold=1)
+    with pytest.raises(ZeroDivisionError):
+        scheduler.call(lambda: 1 / 0)
+
+    stats = scheduler.stats()
+    assert stats['requests'] == 1
+    assert stats['failures'] == 0
+    assert stats['circuit'] == 'closed'
+
+
+def test_circuit_opens_fails_fast_and_recovers():
+    scheduler = RequestScheduler(rate=1000.0, burst=10, max_retries=0, failure_threshold=2, cooldown=0.1)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            scheduler.call(failing(requests.exceptions.ConnectionError("down")))
+    assert scheduler.stats()['circuit'] == 'open'
+
+    # Open: rejected at once without calling upstream
+    calls = []
+    start = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        scheduler.call(calls.append, 1)
+    assert calls == []
+    assert time.monotonic() - start < 0.05
+
+    # After the cooldown a failed trial call reopens the circuit
+    time.sleep(0.12)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        scheduler.call(failing(requests.exceptions.ConnectionError("still down")))
+    assert scheduler.stats()['circuit'] == 'open'
+    assert scheduler.stats()['circuit_opens'] == 2
+
+    # ... and a successful one closes it
+    time.sleep(0.12)
+    assert scheduler.call(lambda: 'ok') == 'ok'
+    assert scheduler.stats()['circuit'] == 'closed'
+
+
+def test_no_retry_into_open_circuit():
+    scheduler = RequestScheduler(rate=1000.0, burst=10, max_retries=5, base_delay=0.001,
+                                 failure_threshold=2, cooldown=10.0)
+    attempts = []
+
+    def down():
+        attempts.append(1)
+        raise requests.exceptions.Timeout("timed out")
+
+    start = time.monotonic()
+    with pytest.raises(requests.exceptions.Timeout):
+        scheduler.call(down)
+    assert len(attempts) == 2
+    assert time.monotonic() - start < 1.0
+
+
+def test_throttle_detection():
+    response = requests.Response()
+    response.status_code = 429
+    assert _is_throttle(requests.exceptions.HTTPError("Too Many Requests", response=response))
+
+    response = requests.Response()
+    response.status_code = 500
+    assert not _is_throttle(requests.exceptions.HTTPError("Server Error", response=response))
+    assert not _is_throttle(ValueError("no data for strike 429"))
+
+
+def test_throttle_empties_bucket():
+    response = requests.Response()
+    response.status_code = 429
+    scheduler = RequestScheduler(rate=1.0, burst=10, max_retries=0)
+    with pytest.raises(requests.exceptions.HTTPError):
+        scheduler.call(failing(requests.exceptions.HTTPError("Too Many Requests", response=response)))
+
+    stats = scheduler.stats()
+    assert stats['throttle_events'] == 1
+    assert stats['tokens'] < 10
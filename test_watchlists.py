@@ -0,0 +1,154 @@
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import watchlists
+from request_scheduler import RequestScheduler
+from vol_surface import VolSurfaceStore
+from watchlists import AlertQueue, WatchlistMonitor
+
+EXPIRATION = (date.today() + timedelta(days=21)).isoformat()
+
+PARAMS = {
+    'min_price': 0.05, 'max_price': 10.0, 'min_iv': 30, 'min_volume': 10, 'min_open_interest': 10,
+    'max_dte': 60, 'min_dte': 5, 'min_delta': 0.05, 'max_delta': 0.45,
+    'min_strangle_cost': 0.20, 'max_strangle_cost': 15.0,
+    'min_underlying_price': 10, 'max_underlying_price': 500,
+}
+
+
+def chain_side(strikes):
+    return pd.DataFrame({
+        'strike': [float(strike) for strike in strikes],
+        'lastPrice': 1.0,
+        'impliedVolatility': 0.5,
+        'volume': 100,
+        'openInterest': 100,
+    })
+
+
+class FakeQuotes:
+    def __init__(self, prices):
+        self.prices = prices
+
+    def get_quotes(self, symbols, priority=None):
+        return {symbol: self.prices.get(symbol) for symbol in symbols}
+
+
+@pytest.fixture
+def market(monkeypatch):
+    """Option chains served by a stubbed yfinance Ticker, editable per test."""
+    state = {'calls': [105, 110], 'puts': [95], 'fetches': 0}
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        @property
+        def options(self):
+            return (EXPIRATION,)
+
+        def option_chain(self, exp_date):
+            state['fetches'] += 1
+            return SimpleNamespace(calls=chain_side(state['calls']), puts=chain_side(state['puts']))
+
+    monkeypatch.setattr(watchlists.yf, 'Ticker', FakeTicker)
+    return state
+
+
+def monitor(prices=None):
+    return WatchlistMonitor(
+        FakeQuotes(prices or {'AAPL': 100.0}),
+        AlertQueue(),
+        scheduler=RequestScheduler(rate=1000.0, burst=100),
+        surfaces=VolSurfaceStore(),
+    )
+
+
+def test_first_evaluation_is_a_silent_baseline(market):
+    watch = monitor()
+    scan = watch.add_scan('test', ['AAPL'], dict(PARAMS))
+
+    summary = watch.refresh()
+    assert summary['evaluations'] == 1
+    assert summary['alerts'] == 0
+    assert len(watch.get_results(scan['id'])) == 2
+
+
+def test_unchanged_chain_is_not_reevaluated(market):
+    watch = monitor()
+    watch.add_scan('test', ['AAPL'], dict(PARAMS))
+    watch.refresh()
+
+    summary = watch.refresh()
+    assert summary['chains'] == 1
+    assert summary['changed'] == 0
+    assert summary['evaluations'] == 0
+    assert summary['alerts'] == 0
+
+
+def test_entered_and_left_alerts(market):
+    watch = monitor()
+    scan = watch.add_scan('test', ['AAPL'], dict(PARAMS))
+    watch.refresh()
+
+    market['calls'] = [110, 115]
+    summary = watch.refresh()
+    assert summary['evaluations'] == 1
+    events = sorted((a['event'], a['strangle']['call_strike']) for a in watch.alerts.since(0))
+    assert events == [('entered', 115.0), ('left', 105.0)]
+    assert sorted(s['call_strike'] for s in watch.get_results(scan['id'])) == [110.0, 115.0]
+
+
+def test_symbol_without_quote_is_baselined_when_it_first_evaluates(market):
+    quotes = {'AAPL': 100.0}
+    watch = monitor(quotes)
+    scan = watch.add_scan('test', ['AAPL', 'MSFT'], dict(PARAMS))
+    watch.refresh()
+
+    # MSFT had no quote on the first refresh, so its first results are silent
+    quotes['MSFT'] = 200.0
+    market['calls'] = [210]
+    market['puts'] = [190]
+    watch.refresh()
+    assert any(s['symbol'] == 'MSFT' for s in watch.get_results(scan['id']))
+    assert not any(a['strangle']['symbol'] == 'MSFT' for a in watch.alerts.since(0))
+
+
+def test_scan_with_bad_params_does_not_stop_others(market):
+    watch = monitor()
+    good = watch.add_scan('good', ['AAPL'], dict(PARAMS))
+    watch.add_scan('bad', ['AAPL'], dict(PARAMS, min_underlying_price='x', min_dte='x'))
+
+    summary = watch.refresh()
+    assert summary['evaluations'] == 1
+    assert len(watch.get_results(good['id'])) == 2
+
+
+def test_add_scan_requires_symbol_list():
+    watch = monitor()
+    with pytest.raises(ValueError):
+        watch.add_scan('test', 'AAPL,MSFT', dict(PARAMS))
+
+
+def test_webhook_delivery_does_not_block_publish(monkeypatch):
+    delivered = []
+
+    def slow_post(url, json, timeout):
+        time.sleep(0.2)
+        delivered.append(json['id'])
+
+    monkeypatch.setattr(watchlists.requests, 'post', slow_post)
+    alerts = AlertQueue(webhook_url='http://example.invalid/hook')
+
+    start = time.monotonic()
+    for _ in range(5):
+        alerts.publish({'event': 'entered'})
+    assert time.monotonic() - start < 0.1
+    assert len(alerts.since(0)) == 5
+
+    alerts._outbox.join()
+    assert delivered == [1, 2, 3, 4, 5]
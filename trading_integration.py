@@ -153,13 +153,7 @@ class AlpacaOptionsTrader:
         # Create the order legs
         legs = []
         for leg in trade_request['legs']:
-            # Format the option symbol in OCC format
-            # Example: AAPL230616C00150000 (AAPL, June 16 2023, Call, $150.00 strike)
-            expiration_date = datetime.strptime(leg['expiration'], '%Y-%m-%d')
-            exp_str = expiration_date.strftime('%y%m%d')
-            option_type_code = 'C' if leg['option_type'].lower() == 'call' else 'P'
-            strike_str = f"{int(leg['strike'] * 1000):08d}"
-            option_symbol = f"{trade_request['symbol']}{exp_str}{option_type_code}{strike_str}"
+            option_symbol = self._option_symbol(trade_request['symbol'], leg)
             
             legs.append({
                 'symbol': option_symbol,
@@ -206,6 +200,18 @@ class AlpacaOptionsTrader:
                 'message': str(e)
             }
     
+    def _option_symbol(self, symbol, leg):
+        """
+        Format an option leg as an OCC symbol.
+        
+        Example: AAPL230616C00150000 (AAPL, June 16 2023, Call, $150.00 strike)
+        """
+        expiration_date = datetime.strptime(leg['expiration'], '%Y-%m-%d')
+        exp_str = expiration_date.strftime('%y%m%d')
+        option_type_code = 'C' if leg['option_type'].lower() == 'call' else 'P'
+        strike_str = f"{int(round(leg['strike'] * 1000)):08d}"
+        return f"{symbol}{exp_str}{option_type_code}{strike_str}"
+    
     def _validate_trade_request(self, trade_request):
         """Validate the trade request structure."""
         required_fields = ['symbol', 'strategy', 'quantity', 'order_type', 'time_in_force', 'legs']
@@ -0,0 +1,262 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+
+from scanner import chain_fingerprint, days_to_expiration
+
+# Fewest usable quotes needed to fit a smile for one expiration
+SMILE_MIN_POINTS = 5
+
+# Residuals beyond this many MADs are dropped before the final fit
+SMILE_OUTLIER_MADS = 3.0
+
+# Tenor of the ATM IV stored for IV rank and percentile
+ATM_TENOR_DAYS = 30
+
+# Floor for fitted IVs (decimal) so far wings never go negative
+MIN_SURFACE_IV = 0.01
+
+
+def fit_smile(calls_df, puts_df, current_price, dte):
+    """
+    Fit a quadratic smile in log-moneyness to one expiration's OTM quotes.
+
+    OTM calls and puts are combined and weighted by liquidity, so thin
+    far-OTM strikes pull less on the fit. All strikes are fit in one
+    weighted least-squares solve, then refit once without outliers.
+
+    Args:
+        calls_df (DataFrame): Calls from the option chain
+        puts_df (DataFrame): Puts from the option chain
+        current_price (float): Underlying price
+        dte (int): Days to expiration
+
+    Returns:
+        dict: Smile coefficients, ATM IV and fit size, or None if there
+            are too few usable quotes
+    """
+    otm = [
+        calls_df[calls_df['strike'] >= current_price],
+        puts_df[puts_df['strike'] < current_price],
+    ]
+    strikes = np.concatenate([df['strike'].to_numpy(dtype=float) for df in otm])
+    ivs = np.concatenate([df['impliedVolatility'].to_numpy(dtype=float) for df in otm])
+    prices = np.concatenate([df['lastPrice'].to_numpy(dtype=float) for df in otm])
+    liquidity = np.concatenate([
+        df['volume'].fillna(0).to_numpy(dtype=float) + df['openInterest'].fillna(0).to_numpy(dtype=float)
+        for df in otm
+    ])
+
+    usable = (strikes > 0) & (prices > 0) & (ivs > MIN_SURFACE_IV) & (ivs < 5)
+    if usable.sum() < SMILE_MIN_POINTS:
+        return None
+
+    k = np.log(strikes[usable] / current_price)
+    y = ivs[usable]
+    weights = np.sqrt(np.sqrt(liquidity[usable] + 1))
+    design = np.column_stack((np.ones_like(k), k, k * k))
+
+    coeffs = _weighted_lstsq(design, y, weights)
+    residuals = y - design @ coeffs
+    mad = np.median(np.abs(residuals - np.median(residuals)))
+    if mad > 0:
+        inliers = np.abs(residuals) <= SMILE_OUTLIER_MADS * 1.4826 * mad
+        if inliers.sum() >= SMILE_MIN_POINTS and not inliers.all():
+            coeffs = _weighted_lstsq(design[inliers], y[inliers], weights[inliers])
+
+    return {
+        'dte': dte,
+        'coeffs': coeffs.tolist(),
+        'atm_iv': max(float(coeffs[0]), MIN_SURFACE_IV),
+        'points': int(usable.sum()),
+    }
+
+
+def _weighted_lstsq(design, y, weights):
+    return np.linalg.lstsq(design * weights[:, None], y * weights, rcond=None)[0]
+
+
+def smile_iv(smile, strikes, current_price):
+    """Fitted IV (decimal) of one expiration's smile at the given strikes."""
+    k = np.log(np.asarray(strikes, dtype=float) / current_price)
+    a, b, c = smile['coeffs']
+    return np.maximum(a + b * k + c * k * k, MIN_SURFACE_IV)
+
+
+def surface_iv(smiles, strike, dte, current_price):
+    """
+    IV at any strike and DTE, interpolating between fitted expirations.
+
+    Total variance is interpolated linearly in time between the two
+    nearest expirations; outside the fitted range the nearest smile's IV
+    is used as is.
+    """
+    smiles = sorted((s for s in smiles if s), key=lambda s: s['dte'])
+    if not smiles:
+        return None
+
+    days = np.array([max(s['dte'], 1) for s in smiles], dtype=float)
+    ivs = np.array([float(smile_iv(s, strike, current_price)) for s in smiles])
+    target = max(dte, 1)
+
+    if target <= days[0]:
+        return float(ivs[0])
+    if target >= days[-1]:
+        return float(ivs[-1])
+
+    variance = np.interp(target, days, ivs ** 2 * days)
+    return float(np.sqrt(variance / target))
+
+
+def atm_expirations(expirations, tenor=ATM_TENOR_DAYS):
+    """
+    The expirations either side of ``tenor`` days, for the ATM IV fit.
+
+    Returns the latest expiration at or before the tenor and the earliest
+    one at or after it, so the ATM IV never depends on a scan's DTE window.
+    Fewer are returned when the listed expirations do not bracket it.
+    """
+    dated = [(days_to_expiration(exp_date), exp_date) for exp_date in expirations]
+    before = [item for item in dated if 1 <= item[0] <= tenor]
+    after = [item for item in dated if item[0] >= tenor]
+    return {item[1] for item in (max(before, default=None), min(after, default=None)) if item}
+
+
+def uses_iv_rank(params):
+    """Whether a scan filters or sorts on IV rank, so needs the ATM expirations."""
+    return bool(params.get('min_iv_rank')) or params.get('sort_by') in ('atm_iv', 'iv_rank', 'iv_percentile')
+
+
+def meets_iv_rank(params, iv_rank):
+    """Whether a symbol's IV rank passes the min_iv_rank scan parameter."""
+    min_iv_rank = params.get('min_iv_rank', 0)
+    return not min_iv_rank or (iv_rank is not None and iv_rank >= min_iv_rank)
+
+
+def with_surface_iv(options_df, smile, current_price):
+    """Copy of a chain side with a surfaceIV column, raw IV if no smile fit."""
+    if smile is None:
+        return options_df.assign(surfaceIV=options_df['impliedVolatility'])
+    return options_df.assign(surfaceIV=smile_iv(smile, options_df['strike'], current_price))
+
+
+class VolSurfaceStore:
+    """
+    Cached smile fits per chain and ATM IV history per symbol.
+
+    Smiles are cached by chain fingerprint, so an unchanged chain is never
+    refit. One ATM IV per symbol per day is kept and backs IV rank and IV
+    percentile.
+    """
+
+    def __init__(self, history_path=None, lookback_days=252, max_fits=4096):
+        """
+        Initialize the store.
+
+        Args:
+            history_path (str): Optional JSON file the ATM IV history persists to
+            lookback_days (int): Days of history used for IV rank and percentile
+            max_fits (int): Number of smile fits kept in the cache
+        """
+        self.history_path = history_path
+        self.lookback_days = lookback_days
+        self.max_fits = max_fits
+        self._fits = OrderedDict()
+        self._history = {}
+        self._history_dirty = False
+        self._lock = threading.Lock()
+
+        if history_path and os.path.exists(history_path):
+            with open(history_path) as f:
+                self._history = json.load(f)
+
+    def smile(self, current_price, dte, calls_df, puts_df):
+        """Get the smile for a chain, fitting it only if the chain changed."""
+        fingerprint = chain_fingerprint(current_price, dte, calls_df, puts_df)
+        with self._lock:
+            if fingerprint in self._fits:
+                self._fits.move_to_end(fingerprint)
+                return self._fits[fingerprint]
+
+        smile = fit_smile(calls_df, puts_df, current_price, dte)
+
+        with self._lock:
+            self._fits[fingerprint] = smile
+            while len(self._fits) > self.max_fits:
+                self._fits.popitem(last=False)
+        return smile
+
+    def symbol_iv(self, symbol, current_price, smiles):
+        """
+        ATM IV, IV rank and IV percentile fields for a symbol's results.
+
+        Args:
+            symbol (str): Underlying symbol
+            current_price (float): Underlying price
+            smiles (list): Smiles of the expirations from atm_expirations
+
+        Returns:
+            dict: atm_iv (percent), iv_rank and iv_percentile, None where
+                unknown. The ATM IV is only computed and recorded when the
+                fitted smiles bracket ATM_TENOR_DAYS.
+        """
+        smiles = [s for s in smiles if s]
+        atm_iv = None
+        if smiles and min(s['dte'] for s in smiles) <= ATM_TENOR_DAYS <= max(s['dte'] for s in smiles):
+            atm_iv = surface_iv(smiles, current_price, ATM_TENOR_DAYS, current_price)
+            self.record_atm_iv(symbol, atm_iv)
+
+        iv_rank, iv_percentile = self.iv_rank(symbol, atm_iv)
+        return {
+            'atm_iv': atm_iv * 100 if atm_iv is not None else None,
+            'iv_rank': iv_rank,
+            'iv_percentile': iv_percentile,
+        }
+
+    def record_atm_iv(self, symbol, atm_iv, day=None):
+        """
+        Store today's ATM IV for a symbol, replacing any earlier value today.
+
+        The history file is only written by save_history, so a scan over
+        many symbols writes it once.
+        """
+        day = (day or date.today()).isoformat()
+        with self._lock:
+            history = self._history.setdefault(symbol, {})
+            history[day] = atm_iv
+            # Keep only the lookback window
+            for old_day in sorted(history)[:-self.lookback_days]:
+                del history[old_day]
+            self._history_dirty = True
+
+    def save_history(self):
+        """Write the ATM IV history to its JSON file if anything changed."""
+        with self._lock:
+            if not self.history_path or not self._history_dirty:
+                return
+            with open(self.history_path, 'w') as f:
+                json.dump(self._history, f)
+            self._history_dirty = False
+
+    def iv_rank(self, symbol, atm_iv):
+        """
+        IV rank and IV percentile of an ATM IV against the stored history.
+
+        Returns:
+            tuple: (rank, percentile) in percent, or (None, None) when there
+                are fewer than two days of history
+        """
+        with self._lock:
+            values = np.array(list(self._history.get(symbol, {}).values()), dtype=float)
+
+        if atm_iv is None or len(values) < 2:
+            return None, None
+
+        low, high = values.min(), values.max()
+        rank = 100.0 * (atm_iv - low) / (high - low) if high > low else 50.0
+        percentile = 100.0 * np.mean(values < atm_iv)
+        return float(np.clip(rank, 0, 100)), float(percentile)
@@ -0,0 +1,377 @@
+import itertools
+import json
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+import requests
+import yfinance as yf
+
+from request_scheduler import PRIORITY_BACKGROUND, RequestScheduler
+from scanner import chain_fingerprint, days_to_expiration, find_strangles, strangle_key, validate_scan_params
+from vol_surface import VolSurfaceStore, atm_expirations, meets_iv_rank, uses_iv_rank, with_surface_iv
+
+
+class AlertQueue:
+    """
+    In-process alert feed with an optional webhook.
+
+    Alerts get increasing integer ids so clients can poll for everything
+    after the last id they saw. When a webhook URL is configured each alert
+    is also POSTed to it as JSON from a background thread, so a slow or
+    unreachable webhook never holds up publishing.
+    """
+
+    def __init__(self, maxlen=1000, webhook_url=None):
+        """
+        Initialize the alert queue.
+
+        Args:
+            maxlen (int): Number of most recent alerts kept for polling
+            webhook_url (str): Optional URL each alert is POSTed to
+        """
+        self.webhook_url = webhook_url
+        self._alerts = deque(maxlen=maxlen)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._outbox = queue.Queue(maxsize=maxlen)
+        self._sender = None
+
+    def publish(self, alert):
+        """Assign an id to an alert, store it and queue it for the webhook."""
+        with self._lock:
+            alert = dict(alert, id=next(self._ids), created_at=datetime.now().isoformat())
+            self._alerts.append(alert)
+            if self.webhook_url and (self._sender is None or not self._sender.is_alive()):
+                self._sender = threading.Thread(target=self._deliver, name='alert-webhook', daemon=True)
+                self._sender.start()
+
+        if self.webhook_url:
+            try:
+                self._outbox.put_nowait(alert)
+            except queue.Full:
+                print(f"Webhook backlog full, alert {alert['id']} is only available by polling")
+
+        return alert
+
+    def _deliver(self):
+        """POST queued alerts to the webhook one at a time."""
+        while True:
+            alert = self._outbox.get()
+            try:
+                requests.post(self.webhook_url, json=alert, timeout=5)
+            except Exception as e:
+                print(f"Error delivering alert {alert['id']} to webhook: {str(e)}")
+            finally:
+                self._outbox.task_done()
+
+    def since(self, alert_id=0):
+        """Get the stored alerts with an id greater than ``alert_id``."""
+        with self._lock:
+            return [alert for alert in self._alerts if alert['id'] > alert_id]
+
+
+class WatchlistMonitor:
+    """
+    Saved scans evaluated incrementally against a shared symbol universe.
+
+    Each refresh quotes the union of all saved symbols in one batch and
+    fetches every needed option chain once. A saved scan is only
+    re-evaluated on chains whose fingerprint changed since that scan last
+    saw them, and alerts fire only for strangles that entered or left its
+    result set.
+    """
+
+    def __init__(self, quote_service, alerts, interval=300, path=None, scheduler=None, surfaces=None):
+        """
+        Initialize the monitor.
+
+        Args:
+            quote_service (QuoteService): Source of underlying prices
+            alerts (AlertQueue): Where entered/left alerts are published
+            interval (float): Seconds between background refreshes
+            path (str): Optional JSON file the saved scans persist to
+            scheduler (RequestScheduler): Gate for upstream chain requests,
+                which run at background priority
+            surfaces (VolSurfaceStore): Smile fits and ATM IV history for
+                the use_surface_iv and min_iv_rank scan parameters
+        """
+        self.quote_service = quote_service
+        self.scheduler = scheduler or RequestScheduler()
+        self.surfaces = surfaces or VolSurfaceStore()
+        self.alerts = alerts
+        self.interval = interval
+        self.path = path
+        self.last_refresh = None
+
+        self._scans = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def add_scan(self, name, symbols, params):
+        """Save a scan definition; it is evaluated on the next refresh."""
+        if not isinstance(symbols, list) or not all(isinstance(s, str) for s in symbols):
+            raise ValueError("Symbols must be a list of ticker strings")
+
+        with self._lock:
+            scan_id = str(next(self._ids))
+            self._scans[scan_id] = {
+                'id': scan_id,
+                'name': name or f'Scan {scan_id}',
+                'symbols': [s.strip().upper() for s in symbols if s.strip()],
+                'params': params,
+                'created_at': datetime.now().isoformat(),
+                'evaluated_at': None,
+                'baselined': set(),
+                'fingerprints': {},
+                'results': {},
+            }
+            self._save()
+            return self._describe(self._scans[scan_id])
+
+    def remove_scan(self, scan_id):
+        """Delete a saved scan. Returns False if it does not exist."""
+        with self._lock:
+            removed = self._scans.pop(scan_id, None) is not None
+            if removed:
+                self._save()
+            return removed
+
+    def list_scans(self):
+        """Get all saved scans without their cached chain state."""
+        with self._lock:
+            return [self._describe(scan) for scan in self._scans.values()]
+
+    def get_results(self, scan_id):
+        """Get the current result set of a saved scan, or None if unknown."""
+        with self._lock:
+            scan = self._scans.get(scan_id)
+            if scan is None:
+                return None
+            return [s for chain in scan['results'].values() for s in chain.values()]
+
+    def start(self):
+        """Start refreshing in a background thread if not already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='watchlist-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing watchlists: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def refresh(self):
+        """
+        Refresh the shared universe once and evaluate saved scans on it.
+
+        Returns:
+            dict: Counts of symbols, chains fetched and changed, scan
+                evaluations run and alerts fired
+        """
+        with self._refresh_lock:
+            with self._lock:
+                scans = list(self._scans.values())
+
+            summary = {'symbols': 0, 'chains': 0, 'changed': 0, 'evaluations': 0, 'alerts': 0}
+            universe = sorted({symbol for scan in scans for symbol in scan['symbols']})
+            summary['symbols'] = len(universe)
+            quotes = self.quote_service.get_quotes(universe, priority=PRIORITY_BACKGROUND)
+
+            for symbol in universe:
+                current_price = quotes.get(symbol)
+                if current_price is None:
+                    print(f"Watchlists: no quote for {symbol}, keeping previous results")
+                    continue
+
+                watching = [scan for scan in scans
+                            if symbol in scan['symbols'] and self._accepts_price(scan, current_price)]
+                try:
+                    chains = self._refresh_symbol(symbol, current_price, watching, summary)
+                except Exception as e:
+                    print(f"Watchlists: error refreshing {symbol}: {str(e)}")
+                    continue
+
+                # Drop chains that expired, left a scan's DTE window or a
+                # scan's price range, so their strangles report as left
+                for scan in scans:
+                    if symbol not in scan['symbols']:
+                        continue
+                    for key in set(scan['results']) | set(scan['fingerprints']):
+                        if key[0] == symbol and key not in chains.get(scan['id'], ()):
+                            self._apply(scan, key, [], summary)
+                            scan['fingerprints'].pop(key, None)
+                    # Later changes to this symbol's results alert for this scan
+                    scan['baselined'].add(symbol)
+
+            self.surfaces.save_history()
+            now = datetime.now().isoformat()
+            with self._lock:
+                for scan in scans:
+                    scan['evaluated_at'] = now
+            self.last_refresh = now
+            return summary
+
+    def _refresh_symbol(self, symbol, current_price, watching, summary):
+        """Fetch a symbol's chains once and evaluate scans whose input changed."""
+        if not watching:
+            return {}
+
+        min_dte = min(scan['params']['min_dte'] for scan in watching)
+        max_dte = max(scan['params']['max_dte'] for scan in watching)
+        stock = yf.Ticker(symbol)
+        chains = {}
+
+        expirations = self.scheduler.call(lambda: stock.options, priority=PRIORITY_BACKGROUND)
+        atm_dates = atm_expirations(expirations)
+        fetch_atm = any(uses_iv_rank(scan['params']) for scan in watching)
+
+        # Same surface and IV rank stage as interactive scans
+        fetched = []
+        for exp_date in expirations:
+            dte = days_to_expiration(exp_date)
+            if (dte < min_dte or dte > max_dte) and not (fetch_atm and exp_date in atm_dates):
+                continue
+
+            opt_chain = self.scheduler.call(stock.option_chain, exp_date, priority=PRIORITY_BACKGROUND)
+            summary['chains'] += 1
+            smile = self.surfaces.smile(current_price, dte, opt_chain.calls, opt_chain.puts)
+            fetched.append((exp_date, dte, opt_chain, smile))
+
+        symbol_fields = self.surfaces.symbol_iv(
+            symbol, current_price, [smile for exp_date, _, _, smile in fetched if exp_date in atm_dates]
+        )
+
+        for exp_date, dte, opt_chain, smile in fetched:
+            covering = [scan for scan in watching
+                        if scan['params']['min_dte'] <= dte <= scan['params']['max_dte']]
+            if not covering:
+                continue
+
+            fingerprint = chain_fingerprint(current_price, dte, opt_chain.calls, opt_chain.puts)
+            calls_df = with_surface_iv(opt_chain.calls, smile, current_price)
+            puts_df = with_surface_iv(opt_chain.puts, smile, current_price)
+            key = (symbol, exp_date)
+            changed = False
+
+            for scan in covering:
+                chains.setdefault(scan['id'], set()).add(key)
+                # A scan's input is the chain plus whether the symbol passes its IV rank floor
+                passes = meets_iv_rank(scan['params'], symbol_fields['iv_rank'])
+                if scan['fingerprints'].get(key) == (fingerprint, passes):
+                    continue
+                changed = True
+
+                strangles = []
+                if passes:
+                    try:
+                        strangles = find_strangles(symbol, current_price, exp_date, dte,
+                                                   calls_df, puts_df, scan['params'])
+                    except Exception as e:
+                        # One broken scan keeps its previous results; the others still run
+                        print(f"Watchlists: error evaluating scan {scan['id']} on {symbol}: {str(e)}")
+                        continue
+                    for strangle in strangles:
+                        strangle.update(symbol_fields)
+                summary['evaluations'] += 1
+                self._apply(scan, key, strangles, summary)
+                scan['fingerprints'][key] = (fingerprint, passes)
+
+            if changed:
+                summary['changed'] += 1
+
+        return chains
+
+    def _apply(self, scan, key, strangles, summary):
+        """Replace one chain's results for a scan and alert on the difference."""
+        with self._lock:
+            previous = scan['results'].get(key, {})
+            current = {strangle_key(s): s for s in strangles}
+            if current:
+                scan['results'][key] = current
+            else:
+                scan['results'].pop(key, None)
+
+        # The first successful evaluation of a symbol sets its baseline silently
+        if key[0] not in scan['baselined']:
+            return
+
+        for event, keys, source in (('entered', current.keys() - previous.keys(), current),
+                                    ('left', previous.keys() - current.keys(), previous)):
+            for strangle_id in keys:
+                self.alerts.publish({
+                    'scan_id': scan['id'],
+                    'scan_name': scan['name'],
+                    'event': event,
+                    'strangle': source[strangle_id],
+                })
+                summary['alerts'] += 1
+
+    @staticmethod
+    def _accepts_price(scan, current_price):
+        """Whether a scan covers this price; scans with unusable params are skipped."""
+        try:
+            params = validate_scan_params(scan['params'])
+            return (params['min_dte'] <= params['max_dte']
+                    and params['min_underlying_price'] <= current_price <= params['max_underlying_price'])
+        except (KeyError, ValueError) as e:
+            print(f"Watchlists: skipping scan {scan['id']}, invalid params: {str(e)}")
+            return False
+
+    @staticmethod
+    def _describe(scan):
+        return {
+            'id': scan['id'],
+            'name': scan['name'],
+            'symbols': scan['symbols'],
+            'params': scan['params'],
+            'created_at': scan['created_at'],
+            'evaluated_at': scan['evaluated_at'],
+            'result_count': sum(len(chain) for chain in scan['results'].values()),
+        }
+
+    def _save(self):
+        """Write scan definitions to the JSON file, if one is configured."""
+        if not self.path:
+            return
+        definitions = [
+            {key: scan[key] for key in ('id', 'name', 'symbols', 'params', 'created_at')}
+            for scan in self._scans.values()
+        ]
+        with open(self.path, 'w') as f:
+            json.dump(definitions, f, indent=2)
+
+    def _load(self):
+        """Restore scan definitions from the JSON file."""
+        with open(self.path) as f:
+            definitions = json.load(f)
+        for definition in definitions:
+            try:
+                params = validate_scan_params(definition['params'])
+            except ValueError as e:
+                # Kept so it can be deleted, but refreshes skip it
+                print(f"Watchlists: saved scan {definition['id']} has invalid params: {str(e)}")
+                params = definition['params']
+            self._scans[definition['id']] = dict(
+                definition, params=params, evaluated_at=None, baselined=set(), fingerprints={}, results={}
+            )
+        if self._scans:
+            self._ids = itertools.count(max(int(scan_id) for scan_id in self._scans) + 1)